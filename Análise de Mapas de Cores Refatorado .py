@@ -1,11 +1,18 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import seaborn as sns
-from matplotlib.colors import ListedColormap
 import os
+import re
 import sys
-import subprocess
+import math
+import hashlib
+import json
+import shutil
+import time
+import argparse
+import importlib.util
+from contextlib import contextmanager
+
+# Pacotes pesados são importados sob demanda (ver _require_*), mantendo a partida da CLI rápida
+np = pd = matplotlib = plt = sns = Image = None
+Colormap = ListedColormap = ScalarMappable = QuadMesh = None
 
 # --- Configurações Globais ---
 OUTPUT_DIR = 'outputs'
@@ -17,6 +24,53 @@ DEFAULT_DPI = 300
 TITLE_FONTSIZE = 15
 LABEL_FONTSIZE = 12
 ANNOT_FONTSIZE = 9
+RENDER_WORKERS = None  # Processos para renderização (None = todos os núcleos, 1 = sequencial)
+USE_DATASET_CACHE = True
+DATASET_CACHE_DIR = os.path.join('.cache', 'datasets')
+DATASET_CACHE_VERSION = 2
+COLORMAP_CACHE_DIR = os.path.join('.cache', 'colormaps')
+COLORMAP_CACHE_VERSION = 1
+CVD_SEVERITY = 1.0  # Severidade da deficiência simulada (0 = visão normal, 1 = dicromacia)
+CVD_FIGURE_DOWNSAMPLE = 4  # Fator de redução das figuras nas comparações de daltonismo
+CVD_FIGURE_PREVIEWS = True  # Prévias de daltonismo das figuras de dados, a partir do buffer já renderizado
+PERCEPTUAL_SAMPLES = 4096  # Amostras por colormap na análise perceptual (ΔE por passo)
+RENDER_MODE = 'full'  # 'full' desenha cada painel; 'recolor' desenha a geometria uma vez e recolore por LUT
+INCREMENTAL_BUILD = True  # Pular figuras cujas entradas (dados, LUTs, parâmetros) não mudaram
+BUILD_MANIFEST_FILE = '.build_manifest.json'  # Gravado dentro de OUTPUT_DIR
+PROFILE_STAGES = True  # Registrar tempo de parede, CPU e pico de RSS por etapa e por figura
+PROFILE_OUTPUT_FILE = 'pipeline_profile.json'  # Gravado dentro de OUTPUT_DIR
+BENCHMARK_SCALES = (10, 100, 1000)  # Multiplicadores do tamanho dos CSVs no benchmark sintético
+EXTRA_COLORMAPS = ()  # Colormaps adicionais (nomes do cmcrameri ou do Matplotlib)
+SCATTER_DENSITY_THRESHOLD = 50_000  # Acima deste número de pontos, a dispersão é agregada em grade 2D
+SCATTER_DENSITY_BINS = 300  # Células por eixo na grade de densidade
+SCATTER_DENSITY_STATISTIC = 'mean'  # 'mean' (média de color_val_col por célula) ou 'count'
+HEATMAP_ANNOT_MAX_CELLS = 400  # Até este número de células, heatmap anotado (Seaborn); acima, imagem única
+HEATMAP_MAX_DISPLAY_CELLS = 200  # Linhas/colunas desenhadas no modo imagem (matrizes maiores são reduzidas)
+HEATMAP_MAX_TICKS = 20  # Rótulos por eixo no modo imagem
+HEATMAP_CLUSTER_REORDER = False  # Reordenar matrizes grandes por similaridade (anos perdem a ordem natural)
+TIME_SERIES_YEARS = range(1990, 2023)  # Anos das animações e small multiples (subcomando 'timeseries')
+TIME_SERIES_CHUNK_YEARS = 4  # Anos por tarefa do pool; cada processo reaproveita o esqueleto da figura
+ANIMATION_FPS = 4
+ANIMATION_DPI = 100
+ANIMATION_FORMATS = ('gif', 'mp4')  # 'mp4' requer ffmpeg no PATH
+SMALL_MULTIPLES_COLUMNS = 6
+SMALL_MULTIPLES_DOWNSAMPLE = 2
+SERVICE_HOST = '127.0.0.1'  # Subcomando 'serve'
+SERVICE_PORT = 8765
+SERVICE_WORKERS = None  # Processos de renderização do serviço (None = todos os núcleos)
+FIGURE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Limite do cache LRU de figuras em memória
+EXPORT_FORMATS = ()  # Exportações a partir do buffer renderizado: 'png', 'webp', 'avif' (vazio = desativado)
+EXPORT_DPI_VARIANTS = (150, 72)  # Resoluções reduzidas exportadas além de DEFAULT_DPI
+EXPORT_TILES = False  # Pirâmide de blocos Deep Zoom (.dzi) para visualização com zoom
+EXPORT_TILE_SIZE = 256
+EXPORT_DIR = 'exports'  # Gravado dentro de OUTPUT_DIR
+EXPORT_PNG_COMPRESS_LEVEL = 6
+EXPORT_WEBP_QUALITY = 90
+EXPORT_AVIF_QUALITY = 75
+EXPORT_AVIF_SPEED = 8  # 0 (lento, menor) a 10 (rápido); 6 custa ~4x mais em figuras de 300 dpi
+EXPORT_WORKERS = None  # Threads de codificação (None = todos os núcleos)
+STREAMING_INGESTION = False  # Ler CSVs em blocos, mantendo só colunas/anos usados (arquivos maiores que a RAM)
+INGESTION_CHUNKSIZE = 200_000
 
 # Nomes simplificados dos colormaps
 COLORMAP_NAMES = {
@@ -26,27 +80,285 @@ COLORMAP_NAMES = {
     'bamako': 'Bamako'
 }
 
-# Aplicar estilo base do Seaborn
-plt.style.use('seaborn-v0_8-whitegrid')
+# Pacote de origem de cada colormap (a versão instalada entra na chave do cache de LUTs)
+COLORMAP_PACKAGES = {
+    'rainbow': 'matplotlib',
+    'batlow': 'cmcrameri',
+    'lapaz': 'cmcrameri',
+    'bamako': 'cmcrameri'
+}
 
-# --- Funções Auxiliares ---
-def install_missing_packages():
-    """Instala pacotes necessários se estiverem faltando."""
-    missing_packages = []
-    
-    # Verificar pacotes necessários
+# Figuras disponíveis na CLI (None = todas)
+FIGURE_TYPES = ('gradient', 'bars', 'scatter', 'grayscale', 'heatmap', 'perceptual', 'cvd')
+RENDER_FIGURES = None
+
+# --- Importações Sob Demanda ---
+def _require_numpy():
+    """Importa o NumPy no primeiro uso."""
+    global np
+    if np is None:
+        import numpy as np
+
+def _require_matplotlib():
+    """Importa NumPy e Matplotlib (backend Agg, estilo base do Seaborn) no primeiro uso."""
+    global matplotlib, plt, Colormap, ListedColormap, ScalarMappable, QuadMesh
+    _require_numpy()
+    if plt is not None:
+        return
+    import matplotlib
+    matplotlib.use('Agg')  # Backend não interativo, seguro para processos filhos
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import Colormap, ListedColormap
+    from matplotlib.cm import ScalarMappable
+    from matplotlib.collections import QuadMesh
+    # Aplicar estilo base do Seaborn
+    plt.style.use('seaborn-v0_8-whitegrid')
+
+def _require_pandas():
+    """Importa o pandas no primeiro uso (apenas figuras que dependem dos datasets)."""
+    global pd
+    _require_numpy()
+    if pd is None:
+        import pandas as pd
+
+def _require_seaborn():
+    """Importa o Seaborn no primeiro uso (heatmaps)."""
+    global sns
+    _require_pandas()
+    if sns is None:
+        import seaborn as sns
+
+def _require_pillow():
+    """Importa o Pillow no primeiro uso (montagem e leitura de PNGs)."""
+    global Image
+    if Image is None:
+        from PIL import Image
+
+def _package_version(package_name):
+    """Versão instalada de um pacote, sem importá-lo."""
+    from importlib import metadata
     try:
-        import cmocean
-    except ImportError:
-        missing_packages.append("cmocean")
+        return metadata.version(package_name)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+# --- Perfil de Execução ---
+STAGE_PROFILE = []
+_ACTIVE_STAGES = []
+
+def _reset_peak_rss():
+    """Zera o pico de RSS do processo (Linux); retorna False se não suportado."""
     try:
-        import colorcet
-    except ImportError:
-        missing_packages.append("colorcet")
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_bytes():
+    """Pico de memória residente do processo, em bytes."""
+    try:
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
     try:
-        import cmcrameri.cm
+        import resource
     except ImportError:
-        missing_packages.append("cmcrameri")
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+@contextmanager
+def profile_stage(stage_name):
+    """Registra tempo de parede, tempo de CPU e pico de RSS de uma etapa do pipeline."""
+    if not PROFILE_STAGES:
+        yield
+        return
+
+    stage_record = {'stage': stage_name, 'pid': os.getpid(), 'observed_peak_rss': 0}
+    if _ACTIVE_STAGES:
+        # Zerar o pico descarta o que a etapa externa já atingiu: registrá-lo antes
+        parent_record = _ACTIVE_STAGES[-1]
+        parent_record['observed_peak_rss'] = max(parent_record['observed_peak_rss'], _peak_rss_bytes() or 0)
+    _ACTIVE_STAGES.append(stage_record)
+    _reset_peak_rss()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        stage_record['wall_time_s'] = time.perf_counter() - wall_start
+        stage_record['cpu_time_s'] = time.process_time() - cpu_start
+        # O pico é zerado ao entrar em subetapas; o da etapa inclui o anterior a elas e o delas
+        peak_rss = max(_peak_rss_bytes() or 0, stage_record.pop('observed_peak_rss'))
+        stage_record['peak_rss_bytes'] = peak_rss
+        _ACTIVE_STAGES.pop()
+        if _ACTIVE_STAGES:
+            parent_record = _ACTIVE_STAGES[-1]
+            parent_record['observed_peak_rss'] = max(parent_record['observed_peak_rss'], peak_rss)
+        STAGE_PROFILE.append(stage_record)
+
+def export_stage_profile(output_filename=None):
+    """Exporta os registros de perfil como JSON e retorna o caminho gravado."""
+    output_path = os.path.join(OUTPUT_DIR, output_filename or PROFILE_OUTPUT_FILE)
+    with open(output_path, 'w', encoding='utf-8') as profile_file:
+        json.dump({'stages': STAGE_PROFILE}, profile_file, ensure_ascii=False, indent=1)
+    print(f"Perfil de execução salvo em: {output_path}")
+    return output_path
+
+def save_figure(output_filename, cvd_preview=False):
+    """Salva a figura atual em OUTPUT_DIR, registrando o custo do savefig.
+
+    Com exportações ou ``cvd_preview``, a figura é desenhada uma única vez e o
+    mesmo buffer RGBA alimenta o PNG, as exportações e a prévia de daltonismo.
+    """
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
+    with profile_stage(f"savefig:{output_filename}"):
+        if not (EXPORT_FORMATS or EXPORT_TILES or cvd_preview) or not output_filename.endswith('.png'):
+            plt.savefig(output_path, dpi=DEFAULT_DPI)
+            return
+        # Desenha uma única vez na resolução final (como o savefig faz) e reaproveita o buffer
+        fig = plt.gcf()
+        base_dpi = fig.dpi
+        fig.set_dpi(DEFAULT_DPI)
+        try:
+            fig.canvas.draw()
+            rgba = np.asarray(fig.canvas.buffer_rgba()).copy()
+        finally:
+            fig.set_dpi(base_dpi)
+        if EXPORT_FORMATS or EXPORT_TILES:
+            export_figure(rgba, output_filename, primary_path=output_path)
+        else:
+            matplotlib.image.imsave(output_path, rgba, format='png', origin='upper', dpi=DEFAULT_DPI)
+    if cvd_preview:
+        with profile_stage(f"cvd_preview:{output_filename}"):
+            save_cvd_preview(rgba, output_filename)
+
+# --- Exportação de Figuras ---
+EXPORT_SAVE_OPTIONS = {
+    'png': lambda: dict(format='PNG', compress_level=EXPORT_PNG_COMPRESS_LEVEL),
+    'webp': lambda: dict(format='WEBP', quality=EXPORT_WEBP_QUALITY, method=4),
+    'avif': lambda: dict(format='AVIF', quality=EXPORT_AVIF_QUALITY, speed=EXPORT_AVIF_SPEED),
+}
+
+def _export_formats_available(formats):
+    """Formatos pedidos que o Pillow instalado consegue codificar."""
+    from PIL import features
+    available = []
+    for fmt in formats:
+        if fmt == 'png' or features.check(fmt):
+            available.append(fmt)
+        else:
+            print(f"Pillow sem suporte a '{fmt}'; formato ignorado.")
+    return available
+
+def _scaled_size(size, scale):
+    """Dimensões reduzidas por um fator, arredondadas para cima (mínimo 1 pixel)."""
+    return tuple(max(1, math.ceil(dimension * scale)) for dimension in size)
+
+def _export_tile_pyramid(image, stem, export_dir, executor):
+    """Gera uma pirâmide Deep Zoom (.dzi + <stem>_files/<nível>/<coluna>_<linha>) a partir da imagem completa."""
+    tile_format = 'webp' if 'webp' in _export_formats_available(['webp']) else 'png'
+    tile_size = EXPORT_TILE_SIZE
+    width, height = image.size
+    tiles_dir = os.path.join(export_dir, f"{stem}_files")
+    shutil.rmtree(tiles_dir, ignore_errors=True)
+
+    futures = []
+    level_image = image
+    max_level = math.ceil(math.log2(max(width, height)))
+    for level in range(max_level, -1, -1):
+        level_dir = os.path.join(tiles_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        level_width, level_height = level_image.size
+        for row in range(math.ceil(level_height / tile_size)):
+            for col in range(math.ceil(level_width / tile_size)):
+                tile = level_image.crop((col * tile_size, row * tile_size,
+                                         min((col + 1) * tile_size, level_width),
+                                         min((row + 1) * tile_size, level_height)))
+                futures.append(executor.submit(tile.save, os.path.join(level_dir, f"{col}_{row}.{tile_format}"),
+                                               **EXPORT_SAVE_OPTIONS[tile_format]()))
+        if level:
+            # Cada nível tem metade da resolução do anterior (arredondada para cima), como no Deep Zoom
+            level_image = level_image.resize(_scaled_size(level_image.size, 0.5), Image.Resampling.LANCZOS)
+
+    with open(os.path.join(export_dir, f"{stem}.dzi"), 'w', encoding='utf-8') as dzi_file:
+        dzi_file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{tile_format}" '
+            f'Overlap="0" TileSize="{tile_size}">\n'
+            f'  <Size Width="{width}" Height="{height}"/>\n'
+            '</Image>\n'
+        )
+    return futures
+
+def _export_dpis():
+    """Resoluções exportadas: DEFAULT_DPI e as variantes menores que ele."""
+    return [DEFAULT_DPI, *(dpi for dpi in EXPORT_DPI_VARIANTS if dpi < DEFAULT_DPI)]
+
+def export_output_paths(output_filename):
+    """Arquivos que ``export_figure`` grava para uma figura (variantes de formato/dpi e o .dzi dos blocos)."""
+    if not output_filename.endswith('.png'):
+        return []
+    stem = os.path.splitext(output_filename)[0]
+    export_dir = os.path.join(OUTPUT_DIR, EXPORT_DIR)
+    paths = [os.path.join(export_dir, f"{stem}@{dpi}dpi.{fmt}")
+             for dpi in _export_dpis() for fmt in _export_formats_available(EXPORT_FORMATS)]
+    if EXPORT_TILES:
+        paths.append(os.path.join(export_dir, f"{stem}.dzi"))
+    return paths
+
+def export_figure(rgba, output_filename, primary_path=None):
+    """Codifica um buffer já renderizado em todos os formatos e resoluções, em paralelo.
+
+    O PNG principal (se pedido) é gravado exatamente como o savefig faria; as
+    variantes reduzidas e a pirâmide de blocos derivam do mesmo buffer, sem
+    renderizar a figura de novo. zlib, libwebp e libavif liberam o GIL, então
+    as codificações rodam em threads.
+    """
+    _require_pillow()
+    from concurrent.futures import ThreadPoolExecutor
+    stem = os.path.splitext(output_filename)[0]
+    export_dir = os.path.join(OUTPUT_DIR, EXPORT_DIR)
+    os.makedirs(export_dir, exist_ok=True)
+    formats = _export_formats_available(EXPORT_FORMATS)
+
+    image = Image.fromarray(rgba)
+    if rgba.shape[-1] == 4 and rgba[..., 3].min() == 255:
+        image = image.convert('RGB')  # Figura opaca: o canal alfa só aumentaria os arquivos
+
+    max_workers = EXPORT_WORKERS if EXPORT_WORKERS is not None else (os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        if primary_path is not None:
+            futures.append(executor.submit(matplotlib.image.imsave, primary_path, rgba,
+                                           format='png', origin='upper', dpi=DEFAULT_DPI))
+
+        resized = {DEFAULT_DPI: image}
+        for dpi in _export_dpis()[1:]:
+            resized[dpi] = executor.submit(image.resize, _scaled_size(image.size, dpi / DEFAULT_DPI),
+                                           Image.Resampling.LANCZOS)
+        for dpi, variant in resized.items():
+            variant = variant if dpi == DEFAULT_DPI else variant.result()
+            for fmt in formats:
+                variant_path = os.path.join(export_dir, f"{stem}@{dpi}dpi.{fmt}")
+                futures.append(executor.submit(variant.save, variant_path, dpi=(dpi, dpi),
+                                               **EXPORT_SAVE_OPTIONS[fmt]()))
+
+        if EXPORT_TILES:
+            futures.extend(_export_tile_pyramid(image, stem, export_dir, executor))
+        for future in futures:
+            future.result()
+
+# --- Funções Auxiliares ---
+VISUALIZATION_PACKAGES = ("cmocean", "colorcet", "cmcrameri")
+
+def install_missing_packages():
+    """Instala pacotes necessários se estiverem faltando (subcomando 'install-deps')."""
+    import subprocess
+    missing_packages = [name for name in VISUALIZATION_PACKAGES if importlib.util.find_spec(name) is None]
 
     if missing_packages:
         print(f"Instalando pacotes: {', '.join(missing_packages)}...")
@@ -56,60 +368,425 @@ def install_missing_packages():
                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
             )
             print("Pacotes instalados com sucesso.")
-            # Importar os pacotes após instalação
-            _import_visualization_packages()
         except subprocess.CalledProcessError as e:
             print(f"Erro ao instalar pacotes: {e}")
-            print("Instale manualmente: 'pip install cmocean colorcet cmcrameri'")
+            print(f"Instale manualmente: 'pip install {' '.join(VISUALIZATION_PACKAGES)}'")
             sys.exit(1)
-    
-    # Garantir que os módulos sejam importados
-    _import_visualization_packages()
 
-def _import_visualization_packages():
-    """Importa pacotes de visualização para o escopo global."""
-    global cmocean, cc, cmc
-    import cmocean
-    import colorcet as cc
-    import cmcrameri.cm as cmc
+def _load_cmcrameri_colormap(name):
+    """Obtém um único colormap de ``cmcrameri.cm`` (o pacote só é importado no primeiro uso)."""
+    try:
+        from cmcrameri import cm as cmcrameri_cm
+    except ImportError:
+        print("Erro: pacote 'cmcrameri' ausente. Execute o subcomando 'install-deps'.")
+        sys.exit(1)
+    cmap_obj = getattr(cmcrameri_cm, name, None)
+    if not isinstance(cmap_obj, Colormap):
+        raise KeyError(f"Colormap desconhecido: '{name}'")
+    return cmap_obj
 
 def load_colormaps():
     """Carrega e retorna colormaps para visualizações."""
     print("Carregando colormaps científicos...")
-    if 'cmc' not in globals() or cmc is None:
-        _import_visualization_packages()
+    _require_matplotlib()
+
+    # Apenas os colormaps usados são carregados, não o pacote inteiro
+    return {name: load_colormap(name) for name in [*COLORMAP_NAMES, *EXTRA_COLORMAPS]}
+
+def colormap_package(name):
+    """Pacote de origem de um colormap: o da tabela ou, fora dela, Matplotlib se registrado, senão cmcrameri."""
+    if name in COLORMAP_PACKAGES:
+        return COLORMAP_PACKAGES[name]
+    _require_matplotlib()
+    return 'matplotlib' if name in matplotlib.colormaps else 'cmcrameri'
+
+def load_colormap(name):
+    """Carrega um colormap pelo nome (registro do Matplotlib ou ``cmcrameri.cm``)."""
+    _require_matplotlib()
+    if colormap_package(name) == 'cmcrameri':
+        return _load_cmcrameri_colormap(name)
+    return matplotlib.colormaps[name]
+
+# --- Cache Colunar de Datasets ---
+def _file_sha256(file_path, chunk_size=1 << 20):
+    """Calcula o hash SHA-256 de um arquivo lendo-o em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _dataset_cache_path(csv_path):
+    """Retorna o diretório de cache colunar associado a um CSV (nome + hash do caminho absoluto)."""
+    cache_name = os.path.splitext(os.path.basename(csv_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(DATASET_CACHE_DIR, f"{cache_name}-{path_hash}")
+
+def _read_cache_meta(cache_path):
+    """Lê os metadados do cache, retornando None se ausentes ou corrompidos."""
+    try:
+        with open(os.path.join(cache_path, 'meta.json'), encoding='utf-8') as meta_file:
+            cache_meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+    if cache_meta.get('version') != DATASET_CACHE_VERSION:
+        return None
+    return cache_meta
+
+def _write_cache_meta(cache_path, cache_meta):
+    """Grava os metadados do cache de forma atômica."""
+    meta_path = os.path.join(cache_path, 'meta.json')
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as meta_file:
+        json.dump(cache_meta, meta_file, ensure_ascii=False, indent=1)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def _build_columnar_cache(csv_path, cache_path, source_stat, source_hash):
+    """Converte um CSV em colunas .npy tipadas (texto como categórico, Year como int16).
+
+    As linhas são gravadas já agrupadas por ano (ver ``year_row_order``), para que
+    as fatias de ``YearIndexedDataset`` sejam vistas das colunas mapeadas.
+    """
+    print(f"Convertendo '{csv_path}' para cache colunar...")
+    df = pd.read_csv(csv_path)
+    if {'Year', 'Code'} <= set(df.columns) and df['Year'].notna().all():
+        df = df.take(year_row_order(df['Year'].to_numpy(), df['Code'].isna().to_numpy())).reset_index(drop=True)
 
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.makedirs(cache_path)
+
+    columns_meta = []
+    for col_idx, col_name in enumerate(df.columns):
+        series = df[col_name]
+        col_file = f"col_{col_idx}.npy"
+        col_meta = {'name': col_name, 'file': col_file}
+
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            # Colunas textuais (Entity, Code) viram categóricas: códigos inteiros + categorias
+            categorical = series.astype('category')
+            col_meta['kind'] = 'category'
+            col_meta['categories'] = [str(cat) for cat in categorical.cat.categories]
+            values = categorical.cat.codes.to_numpy()
+        elif col_name == 'Year' and series.notna().all() and series.between(-32768, 32767).all():
+            col_meta['kind'] = 'numeric'
+            values = series.to_numpy(dtype=np.int16)
+        else:
+            col_meta['kind'] = 'numeric'
+            values = series.to_numpy()
+
+        np.save(os.path.join(cache_path, col_file), values)
+        columns_meta.append(col_meta)
+
+    # Metadados gravados por último: sua presença marca o cache como válido
+    _write_cache_meta(cache_path, {
+        'version': DATASET_CACHE_VERSION,
+        'source_mtime_ns': source_stat.st_mtime_ns,
+        'source_size': source_stat.st_size,
+        'source_sha256': source_hash,
+        'n_rows': len(df),
+        'columns': columns_meta,
+    })
+    # Retornar a versão lida do cache garante os mesmos tipos em todas as execuções
+    return _load_columnar_cache(cache_path, _read_cache_meta(cache_path))
+
+def _load_columnar_cache(cache_path, cache_meta):
+    """Reconstrói o DataFrame a partir das colunas .npy mapeadas em memória."""
+    columns_data = {}
+    for col_meta in cache_meta['columns']:
+        values = np.load(os.path.join(cache_path, col_meta['file']), mmap_mode='r')
+        if col_meta['kind'] == 'category':
+            columns_data[col_meta['name']] = pd.Categorical.from_codes(
+                np.asarray(values), categories=col_meta['categories']
+            )
+        else:
+            columns_data[col_meta['name']] = values
+    return pd.DataFrame(columns_data, copy=False)
+
+def read_csv_cached(csv_path):
+    """Lê um CSV usando o cache colunar, reconstruindo-o se a fonte mudar."""
+    if not USE_DATASET_CACHE:
+        return pd.read_csv(csv_path)
+
+    source_stat = os.stat(csv_path)
+    cache_path = _dataset_cache_path(csv_path)
+    cache_meta = _read_cache_meta(cache_path)
+
+    if cache_meta is not None:
+        if (cache_meta['source_mtime_ns'] == source_stat.st_mtime_ns
+                and cache_meta['source_size'] == source_stat.st_size):
+            return _load_columnar_cache(cache_path, cache_meta)
+
+        # mtime mudou: o conteúdo só é relido se o hash também mudou
+        source_hash = _file_sha256(csv_path)
+        if cache_meta['source_sha256'] == source_hash:
+            cache_meta['source_mtime_ns'] = source_stat.st_mtime_ns
+            _write_cache_meta(cache_path, cache_meta)
+            return _load_columnar_cache(cache_path, cache_meta)
+    else:
+        source_hash = _file_sha256(csv_path)
+
+    try:
+        return _build_columnar_cache(csv_path, cache_path, source_stat, source_hash)
+    except OSError as e:
+        print(f"Aviso: não foi possível gravar o cache de '{csv_path}': {e}")
+        return pd.read_csv(csv_path)
+
+# --- Registro de LUTs de Colormaps ---
+_COLORMAP_LUTS = {}
+
+def rgb_to_grayscale_values(rgb_colors_array):
+    """Converte array RGB para valores em escala de cinza usando luminância."""
+    return np.dot(rgb_colors_array[:, :3], [0.299, 0.587, 0.114])
+
+def srgb_to_linear(rgb):
+    """Remove a curva gama do sRGB (valores em [0, 1])."""
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(linear_rgb):
+    """Aplica a curva gama do sRGB a valores lineares em [0, 1]."""
+    linear_rgb = np.clip(linear_rgb, 0, 1)
+    return np.where(linear_rgb <= 0.0031308, linear_rgb * 12.92, 1.055 * linear_rgb ** (1 / 2.4) - 0.055)
+
+def rgb_to_relative_luminance(rgb_colors_array):
+    """Calcula a luminância relativa (sRGB linearizado, Rec. 709) de um array RGB."""
+    rgb = np.asarray(rgb_colors_array, dtype=float)[:, :3]
+    return srgb_to_linear(rgb) @ np.array([0.2126, 0.7152, 0.0722])
+
+def _colormap_version(name, cmap_obj):
+    """Identifica a versão de um colormap: pacote de origem, sua versão e resolução."""
+    package_name = colormap_package(name)
+    package_version = _package_version(package_name)
+    return f"v{COLORMAP_CACHE_VERSION}-{package_name}-{package_version}-N{cmap_obj.N}"
+
+def _build_colormap_lut(cmap_obj):
+    """Amostra o colormap uma única vez e deriva seus arrays perceptuais."""
+    rgba = cmap_obj(np.linspace(0, 1, cmap_obj.N))
+    # Arrays usados na renderização ficam em float64 para reproduzir exatamente ``cmap_obj(x)``
     return {
-        'rainbow': plt.cm.rainbow,
-        'batlow': cmc.batlow,
-        'lapaz': cmc.lapaz,
-        'bamako': cmc.bamako
+        'rgba': rgba,
+        'rgba_uint8': np.round(rgba * 255).astype(np.uint8),
+        'grayscale': rgb_to_grayscale_values(rgba),
+        'luminance': rgb_to_relative_luminance(rgba).astype(np.float32),
     }
 
-def load_datasets():
-    """Carrega datasets de IDH, felicidade e expectativa de vida."""
-    print("Carregando datasets...")
+def get_colormap_lut(name, cmap_obj):
+    """Retorna a LUT de um colormap, memorizada em memória e em disco por nome e versão."""
+    cache_key = (name, _colormap_version(name, cmap_obj))
+    if cache_key in _COLORMAP_LUTS:
+        return _COLORMAP_LUTS[cache_key]
+
+    cache_file = os.path.join(COLORMAP_CACHE_DIR, f"{name}-{cache_key[1]}.npz")
     try:
-        hdi_data = pd.read_csv('human-development-index.csv')
-        happiness_data = pd.read_csv('happiness-cantril-ladder.csv')
-        life_expectancy_data = pd.read_csv('life-expectancy.csv')
-        return hdi_data, happiness_data, life_expectancy_data
+        with np.load(cache_file) as cached_arrays:
+            lut = {key: cached_arrays[key] for key in cached_arrays.files}
+    except (OSError, ValueError):
+        lut = _build_colormap_lut(cmap_obj)
+        try:
+            os.makedirs(COLORMAP_CACHE_DIR, exist_ok=True)
+            np.savez(cache_file + '.tmp.npz', **lut)
+            os.replace(cache_file + '.tmp.npz', cache_file)
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar o cache do colormap '{name}': {e}")
+
+    _COLORMAP_LUTS[cache_key] = lut
+    return lut
+
+def sample_colormap(name, cmap_obj, values):
+    """Obtém cores RGBA para valores em [0, 1] pela LUT, como ``cmap_obj(values)``."""
+    lut_rgba = get_colormap_lut(name, cmap_obj)['rgba']
+    n_colors = len(lut_rgba)
+    # Mesma regra de indexação do Matplotlib: floor(x * N), com 1.0 no último índice
+    lut_idx = np.clip((np.asarray(values, dtype=float) * n_colors).astype(int), 0, n_colors - 1)
+    return lut_rgba[lut_idx]
+
+def resample_colormap(name, cmap_obj, n_samples):
+    """``n_samples`` cores RGBA igualmente espaçadas em [0, 1], sem repetir entradas da LUT.
+
+    Colormaps segmentados são reavaliados com ``n_samples`` entradas; os listados
+    são interpolados linearmente entre suas cores.
+    """
+    if isinstance(cmap_obj, matplotlib.colors.LinearSegmentedColormap):
+        return cmap_obj.resampled(n_samples)(np.arange(n_samples))
+    lut_rgba = get_colormap_lut(name, cmap_obj)['rgba']
+    lut_positions = np.linspace(0, 1, len(lut_rgba))
+    sample_positions = np.linspace(0, 1, n_samples)
+    return np.stack([np.interp(sample_positions, lut_positions, lut_rgba[:, channel])
+                     for channel in range(lut_rgba.shape[1])], axis=-1)
+
+def warm_colormap_luts(colormaps):
+    """Pré-carrega as LUTs de todos os colormaps (herdadas pelos processos filhos)."""
+    for name, cmap_obj in colormaps.items():
+        get_colormap_lut(name, cmap_obj)
+
+# --- Ingestão em Blocos ---
+def read_csv_streaming(csv_path, value_cols, years, chunksize=None):
+    """Lê um CSV em blocos, mantendo apenas as colunas e anos pedidos e descartando agregados.
+
+    As linhas selecionadas são acumuladas por ano, de modo que o pico de memória
+    depende do recorte selecionado e não do tamanho do arquivo.
+    """
+    chunksize = chunksize or INGESTION_CHUNKSIZE
+    wanted_years = set(int(year_val) for year_val in years)
+    key_cols = ['Entity', 'Code', 'Year']
+    year_chunks = {}
+
+    reader = pd.read_csv(csv_path, usecols=key_cols + list(value_cols), chunksize=chunksize,
+                         dtype={'Entity': str, 'Code': str})
+    for chunk in reader:
+        chunk = chunk[chunk['Code'].notna() & chunk['Year'].isin(wanted_years)]
+        for year_val, year_df in chunk.groupby('Year', sort=False):
+            year_chunks.setdefault(int(year_val), []).append(year_df)
+
+    ordered_cols = key_cols + list(value_cols)
+    if not year_chunks:
+        return pd.DataFrame(columns=ordered_cols)
+
+    # Tabelas por ano concatenadas em ordem de ano, preservando a ordem do arquivo em cada ano
+    selected_df = pd.concat(
+        [pd.concat(year_chunks[year_val]) for year_val in sorted(year_chunks)], ignore_index=True
+    )[ordered_cols]
+    selected_df['Entity'] = selected_df['Entity'].astype('category')
+    selected_df['Code'] = selected_df['Code'].astype('category')
+    selected_df['Year'] = selected_df['Year'].astype(np.int16)
+    return selected_df
+
+# --- Registro de Datasets ---
+# Indicadores disponíveis: CSV no formato Entity, Code, Year, valor, e os rótulos usados nas figuras
+DATASET_REGISTRY = {
+    'hdi': {
+        'path': 'human-development-index.csv',
+        'value_col': 'Human Development Index',
+        'title': 'Índice de Desenvolvimento Humano',
+        'short_title': 'IDH',
+    },
+    'happiness': {
+        'path': 'happiness-cantril-ladder.csv',
+        'value_col': 'Cantril ladder score',
+        'title': 'Felicidade (Escada de Cantril)',
+        'short_title': 'Felicidade',
+    },
+    'life_expectancy': {
+        'path': 'life-expectancy.csv',
+        'value_col': 'Period life expectancy at birth - Sex: total - Age: 0',
+        'title': 'Expectativa de Vida',
+        'short_title': 'Expectativa de Vida',
+        'axis_label': 'Expectativa de Vida (anos)',
+    },
+}
+
+def register_dataset(name, path, value_col, title=None, short_title=None, axis_label=None):
+    """Registra (ou substitui) um indicador disponível para o pipeline."""
+    DATASET_REGISTRY[name] = {
+        'path': path,
+        'value_col': value_col,
+        'title': title or value_col,
+        'short_title': short_title or title or value_col,
+    }
+    if axis_label:
+        DATASET_REGISTRY[name]['axis_label'] = axis_label
+
+def dataset_axis_label(name):
+    """Rótulo de eixo de um indicador (a própria coluna de valor, se não houver rótulo)."""
+    dataset_spec = DATASET_REGISTRY[name]
+    return dataset_spec.get('axis_label', dataset_spec['value_col'])
+
+def load_dataset(name, years):
+    """Carrega um indicador registrado (em blocos, apenas os anos pedidos)."""
+    _require_pandas()
+    dataset_spec = DATASET_REGISTRY[name]
+    try:
+        if STREAMING_INGESTION:
+            return read_csv_streaming(dataset_spec['path'], [dataset_spec['value_col']], years)
+        return read_csv_cached(dataset_spec['path'])
     except FileNotFoundError as e:
         print(f"Erro: Arquivo não encontrado: {e.filename}")
         print("Verifique se os arquivos CSV estão no diretório do script.")
         sys.exit(1)
 
+def load_datasets(dataset_years=None):
+    """Carrega cada dataset pedido uma única vez ({nome: anos}; padrão: IDH, felicidade e expectativa de vida)."""
+    if dataset_years is None:
+        dataset_years = {
+            'hdi': [TARGET_YEAR_HDI, *YEARS_FOR_CORRELATION],
+            'happiness': YEARS_FOR_CORRELATION,
+            'life_expectancy': [TARGET_YEAR_LIFE_EXPECTANCY],
+        }
+    print("Carregando datasets...")
+    if STREAMING_INGESTION:
+        print("Modo de ingestão em blocos ativado.")
+    return {name: load_dataset(name, years) for name, years in dataset_years.items()}
+
+# --- Índice por Ano ---
+def year_row_order(year_values, is_aggregate):
+    """Ordem estável das linhas por ano, com países antes dos agregados (Code nulo) em cada ano."""
+    # lexsort é estável; a última chave é a principal
+    return np.lexsort((is_aggregate, year_values))
+
+class YearIndexedDataset:
+    """Dataset agrupado uma única vez por (Year, país/agregado) com fatias por ano sem cópia.
+
+    As linhas são ordenadas de forma estável (``year_row_order``): dentro de cada
+    ano, países vêm antes dos agregados regionais. Se o DataFrame já está nessa
+    ordem (cache colunar, ingestão em blocos), cada ano é uma fatia ``iloc`` dos
+    dados originais, sem cópia; caso contrário, só as linhas do ano pedido são
+    copiadas, na hora da consulta.
+    """
+
+    def __init__(self, df):
+        year_values = df['Year'].to_numpy()
+        is_aggregate = df['Code'].isna().to_numpy()
+        row_order = year_row_order(year_values, is_aggregate)
+
+        self.df = df
+        self._row_order = None if (row_order[1:] > row_order[:-1]).all() else row_order
+        self.aggregate_mask = is_aggregate[row_order]
+
+        sorted_years = year_values[row_order]
+        unique_years, year_starts = np.unique(sorted_years, return_index=True)
+        year_stops = np.append(year_starts[1:], len(sorted_years))
+        countries_before = np.concatenate(([0], np.cumsum(~self.aggregate_mask)))
+        country_counts = countries_before[year_stops] - countries_before[year_starts]
+
+        self._bounds = {
+            int(year_val): (int(start), int(start + n_countries), int(stop))
+            for year_val, start, n_countries, stop in zip(unique_years, year_starts, country_counts, year_stops)
+        }
+
+    @property
+    def years(self):
+        """Anos disponíveis, em ordem crescente."""
+        return list(self._bounds)
+
+    def year_view(self, year, countries_only=False):
+        """Retorna a fatia do ano (opcionalmente só países) sem máscara booleana."""
+        if year not in self._bounds:
+            return self.df.iloc[0:0]
+        start, country_stop, stop = self._bounds[year]
+        rows = slice(start, country_stop if countries_only else stop)
+        if self._row_order is None:
+            return self.df.iloc[rows]
+        return self.df.take(self._row_order[rows])
+
+def _as_year_indexed(data):
+    """Aceita DataFrame ou YearIndexedDataset e retorna o dataset indexado."""
+    if isinstance(data, YearIndexedDataset):
+        return data
+    return YearIndexedDataset(data)
+
+def prepare_indicator_data(data, value_col, year, label=None):
+    """Países com valor do indicador no ano especificado."""
+    print(f"Preparando dados de {label or value_col} para {year}...")
+    year_df = _as_year_indexed(data).year_view(year, countries_only=True)
+    countries_df = year_df[year_df[value_col].notna()].copy()
+    return countries_df
+
 def prepare_hdi_data(hdi_df, year):
     """Prepara dados de IDH para o ano especificado."""
-    print(f"Preparando dados de IDH para {year}...")
-    hdi_year_df = hdi_df[hdi_df['Year'] == year].copy()
-    hdi_countries_df = hdi_year_df[
-        hdi_year_df['Code'].notna() & hdi_year_df['Human Development Index'].notna()
-    ].copy()
-    return hdi_countries_df
+    return prepare_indicator_data(hdi_df, DATASET_REGISTRY['hdi']['value_col'], year, 'IDH')
 
 def plot_gradients_comparison(colormaps, output_filename="gradient_comparison.png"):
     """Cria imagem comparando gradientes de colormaps."""
+    if RENDER_MODE == 'recolor':
+        return _plot_gradients_recolored(colormaps, output_filename)
     print("Criando comparação de gradientes...")
     gradient_data = np.linspace(0, 1, 256).reshape(1, -1)
     gradient_image = np.vstack((gradient_data, gradient_data))
@@ -126,12 +803,13 @@ def plot_gradients_comparison(colormaps, output_filename="gradient_comparison.pn
         axes[i].set_xticks([0, 63, 127, 191, 255])
         axes[i].set_xticklabels(['0.0', '0.25', '0.5', '0.75', '1.0'], fontsize=LABEL_FONTSIZE)
     
-    plt.savefig(os.path.join(OUTPUT_DIR, output_filename), dpi=DEFAULT_DPI)
+    save_figure(output_filename)
     plt.close(fig)
     print(f"Comparação de gradientes salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
 
 def plot_bar_chart_comparison(data_df, value_col, label_col, title_prefix, colormaps, 
-                             output_filename="barplots_comparison.png", xlim_range=None, top_n=20):
+                             output_filename="barplots_comparison.png", xlim_range=None, top_n=20,
+                             cvd_preview=False):
     """Cria gráficos de barras horizontais para os N maiores valores."""
     print(f"Criando comparação de gráficos de barras para '{title_prefix}'...")
     num_colormaps = len(colormaps)
@@ -143,7 +821,7 @@ def plot_bar_chart_comparison(data_df, value_col, label_col, title_prefix, color
     sorted_data_top_n = data_df.sort_values(value_col, ascending=False).head(top_n)
 
     for i, (name, cmap_obj) in enumerate(colormaps.items()):
-        bar_colors = cmap_obj(np.linspace(0, 1, len(sorted_data_top_n)))
+        bar_colors = sample_colormap(name, cmap_obj, np.linspace(0, 1, len(sorted_data_top_n)))
         axes[i].barh(sorted_data_top_n[label_col], sorted_data_top_n[value_col], 
                    color=bar_colors, edgecolor='grey', linewidth=0.5)
         axes[i].set_title(f"{title_prefix} - {COLORMAP_NAMES.get(name, name.capitalize())}", 
@@ -157,12 +835,54 @@ def plot_bar_chart_comparison(data_df, value_col, label_col, title_prefix, color
         axes[i].grid(axis='x', linestyle=':', alpha=0.6)
         axes[i].invert_yaxis()
 
-    plt.savefig(os.path.join(OUTPUT_DIR, output_filename), dpi=DEFAULT_DPI)
+    save_figure(output_filename, cvd_preview)
     plt.close(fig)
     print(f"Comparação de gráficos de barras salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
 
+def density_bin_2d(x_values, y_values, color_values=None, bins=None, statistic='mean'):
+    """Agrega pontos em uma grade bins × bins: contagem ou média de `color_values` por célula.
+
+    Sem ``bins``, usa ``SCATTER_DENSITY_BINS``. Retorna (grade, extent); a grade tem
+    forma (bins_y, bins_x), com NaN nas células vazias.
+    """
+    bins = bins or SCATTER_DENSITY_BINS
+    x_values = np.asarray(x_values, dtype=float)
+    y_values = np.asarray(y_values, dtype=float)
+    valid = np.isfinite(x_values) & np.isfinite(y_values)
+    if statistic == 'mean':
+        color_values = np.asarray(color_values, dtype=float)
+        valid &= np.isfinite(color_values)
+        color_values = color_values[valid]
+    x_values, y_values = x_values[valid], y_values[valid]
+
+    extent = []
+    bin_indices = []
+    for axis_values in (x_values, y_values):
+        low, high = (axis_values.min(), axis_values.max()) if axis_values.size else (0.0, 1.0)
+        if high <= low:
+            low, high = low - 0.5, high + 0.5
+        extent.extend([low, high])
+        # Índice da célula por divisão direta; o máximo cai na última célula
+        scaled = (axis_values - low) * (bins / (high - low))
+        bin_indices.append(np.minimum(scaled.astype(np.intp), bins - 1))
+
+    flat_indices = bin_indices[1] * bins + bin_indices[0]
+    counts = np.bincount(flat_indices, minlength=bins * bins).astype(float)
+    if statistic == 'count':
+        grid = counts
+    else:
+        sums = np.bincount(flat_indices, weights=color_values, minlength=bins * bins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid = sums / counts
+    grid[counts == 0] = np.nan
+    return grid.reshape(bins, bins), extent
+
+def _use_density_scatter(n_points):
+    """Decide entre dispersão exata e grade agregada pelo número de pontos."""
+    return n_points > SCATTER_DENSITY_THRESHOLD
+
 def plot_scatter_comparison(data_df, x_col, y_col, color_val_col, title_prefix, colormaps, 
-                           output_filename="scatter_comparison.png"):
+                           output_filename="scatter_comparison.png", cvd_preview=False):
     """Cria gráficos de dispersão, colorindo pontos por uma terceira variável."""
     print(f"Criando comparação de gráficos de dispersão para '{title_prefix}'...")
     num_colormaps = len(colormaps)
@@ -172,13 +892,37 @@ def plot_scatter_comparison(data_df, x_col, y_col, color_val_col, title_prefix,
     fig, axes = plt.subplots(rows, cols, figsize=(8 * cols, 6.5 * rows), squeeze=False, constrained_layout=True)
     axes_flat = axes.flatten()
 
+    # Para muitos pontos, a grade é agregada uma única vez e reutilizada em todos os painéis
+    density_mode = _use_density_scatter(len(data_df))
+    if density_mode:
+        statistic = SCATTER_DENSITY_STATISTIC
+        print(f"  {len(data_df)} pontos: agregando em grade {SCATTER_DENSITY_BINS}x{SCATTER_DENSITY_BINS} ({statistic}).")
+        density_grid, density_extent = density_bin_2d(
+            data_df[x_col].to_numpy(), data_df[y_col].to_numpy(),
+            data_df[color_val_col].to_numpy() if statistic == 'mean' else None,
+            statistic=statistic
+        )
+        if statistic == 'count':
+            density_norm = matplotlib.colors.LogNorm(vmin=1, vmax=max(np.nanmax(density_grid), 1))
+            cbar_label = 'Pontos por célula'
+        else:
+            density_norm = matplotlib.colors.Normalize(np.nanmin(density_grid), np.nanmax(density_grid))
+            cbar_label = f"{color_val_col} (média por célula)"
+
     for i, (name, cmap_obj) in enumerate(colormaps.items()):
         ax = axes_flat[i]
-        scatter_plot = ax.scatter(
-            data_df[x_col], data_df[y_col], 
-            c=data_df[color_val_col], cmap=cmap_obj, 
-            s=60, alpha=0.8, edgecolor='k', linewidth=0.3
-        )
+        if density_mode:
+            scatter_plot = ax.imshow(
+                density_grid, origin='lower', extent=density_extent, aspect='auto',
+                cmap=cmap_obj, norm=density_norm, interpolation='nearest'
+            )
+        else:
+            scatter_plot = ax.scatter(
+                data_df[x_col], data_df[y_col], 
+                c=data_df[color_val_col], cmap=cmap_obj, 
+                s=60, alpha=0.8, edgecolor='k', linewidth=0.3
+            )
+            cbar_label = color_val_col
         ax.set_title(f"{title_prefix} - {COLORMAP_NAMES.get(name, name.capitalize())}", fontsize=TITLE_FONTSIZE)
         ax.set_xlabel(x_col, fontsize=LABEL_FONTSIZE)
         ax.set_ylabel(y_col, fontsize=LABEL_FONTSIZE)
@@ -186,20 +930,22 @@ def plot_scatter_comparison(data_df, x_col, y_col, color_val_col, title_prefix,
         ax.grid(linestyle=':', alpha=0.6)
         
         # Barra de cores
-        cbar = fig.colorbar(scatter_plot, ax=ax, label=color_val_col)
+        cbar = fig.colorbar(scatter_plot, ax=ax, label=cbar_label)
         cbar.ax.tick_params(labelsize=LABEL_FONTSIZE-1)
-        cbar.set_label(color_val_col, size=LABEL_FONTSIZE)
+        cbar.set_label(cbar_label, size=LABEL_FONTSIZE)
 
     # Ocultar subplots não utilizados
     for j in range(i + 1, len(axes_flat)):
         fig.delaxes(axes_flat[j])
 
-    plt.savefig(os.path.join(OUTPUT_DIR, output_filename), dpi=DEFAULT_DPI)
+    save_figure(output_filename, cvd_preview)
     plt.close(fig)
     print(f"Comparação de gráficos de dispersão salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
 
 def plot_grayscale_comparison(colormaps, output_filename="grayscale_comparison.png"):
     """Compara colormaps em sua forma original e em escala de cinza."""
+    if RENDER_MODE == 'recolor':
+        return _plot_grayscale_recolored(colormaps, output_filename)
     print("Criando comparação de versões em escala de cinza...")
     gradient_data = np.linspace(0, 1, 256).reshape(1, -1)
     gradient_image = np.vstack((gradient_data, gradient_data))
@@ -209,10 +955,6 @@ def plot_grayscale_comparison(colormaps, output_filename="grayscale_comparison.p
     if num_colormaps == 1:
          axes = np.array([axes]).reshape(1,2)
 
-    def rgb_to_grayscale_values(rgb_colors_array):
-        """Converte array RGB para valores em escala de cinza usando luminância."""
-        return np.dot(rgb_colors_array[:, :3], [0.299, 0.587, 0.114])
-
     for i, (name, cmap_original_obj) in enumerate(colormaps.items()):
         # Colormap original
         current_ax_original = axes[i, 0] if num_colormaps > 1 else axes[0]
@@ -222,8 +964,7 @@ def plot_grayscale_comparison(colormaps, output_filename="grayscale_comparison.p
         current_ax_original.set_xticks([])
 
         # Escala de cinza
-        original_colors_array = cmap_original_obj(np.linspace(0, 1, 256))
-        grayscale_val_array = rgb_to_grayscale_values(original_colors_array)
+        grayscale_val_array = get_colormap_lut(name, cmap_original_obj)['grayscale']
         grayscale_cmap_obj = ListedColormap(np.column_stack([grayscale_val_array] * 3))
         
         current_ax_grayscale = axes[i, 1] if num_colormaps > 1 else axes[1]
@@ -233,97 +974,245 @@ def plot_grayscale_comparison(colormaps, output_filename="grayscale_comparison.p
         current_ax_grayscale.set_yticks([])
         current_ax_grayscale.set_xticks([])
 
-    plt.savefig(os.path.join(OUTPUT_DIR, output_filename), dpi=DEFAULT_DPI)
+    save_figure(output_filename)
     plt.close(fig)
     print(f"Comparação em escala de cinza salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
 
-def prepare_year_to_year_correlation_data(hdi_df, happiness_df, years_range):
-    """Prepara dados para correlação ano a ano para IDH e Felicidade."""
+# --- Correlação Ano a Ano Vetorizada ---
+CORRELATION_METHODS = ('pearson', 'spearman', 'kendall')
+
+def pivot_indicator_by_year(data, value_col, years_range):
+    """Pivota um indicador uma única vez em uma matriz País (Code, Entity) × Ano.
+
+    Entidades que compartilham o código (ex.: regiões subnacionais) ficam em
+    linhas próprias; linhas repetidas de uma mesma entidade e ano são promediadas.
+    """
+    indexed = _as_year_indexed(data)
+    year_frames = [indexed.year_view(year_val, countries_only=True) for year_val in years_range]
+    year_frames = [year_df for year_df in year_frames if not year_df.empty]
+    if not year_frames:
+        return pd.DataFrame(dtype=float)
+
+    rows_df = pd.concat(year_frames, ignore_index=True)
+    return pd.DataFrame({
+        'Code': rows_df['Code'].astype(str).to_numpy(),
+        'Entity': rows_df['Entity'].astype(str).to_numpy(),
+        'Year': rows_df['Year'].to_numpy(dtype=int),
+        value_col: rows_df[value_col].to_numpy(dtype=float),
+    }).groupby(['Code', 'Entity', 'Year'])[value_col].mean().unstack('Year')
+
+def _rank_columns(values):
+    """Converte cada coluna em postos médios, preservando NaN (para Spearman)."""
+    return pd.DataFrame(values).rank(method='average').to_numpy()
+
+def _pearson_matrix(values, present_mask):
+    """Correlação de Pearson entre colunas, com dados completos por par (pairwise-complete)."""
+    present = present_mask.astype(float)
+    filled = np.where(present_mask, values, 0.0)
+
+    # Contagens, somas e produtos cruzados restritos às linhas presentes em ambas as colunas
+    pair_counts = present.T @ present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sum_x = filled.T @ present
+        sum_xx = (filled ** 2).T @ present
+        sum_xy = filled.T @ filled
+        covariance = pair_counts * sum_xy - sum_x * sum_x.T
+        variance_x = pair_counts * sum_xx - sum_x ** 2
+        corr = covariance / np.sqrt(variance_x * variance_x.T)
+    corr[pair_counts < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+def _pearson_matrix_complete(values):
+    """Correlação de Pearson entre colunas sem valores ausentes."""
+    centered = values - values.mean(axis=0)
+    cross_products = centered.T @ centered
+    norms = np.sqrt(np.diag(cross_products))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cross_products / np.outer(norms, norms)
+    return np.clip(corr, -1.0, 1.0)
+
+def _count_inversions(sequence):
+    """Pares i < j com sequence[i] > sequence[j], por mergesort de baixo para cima vetorizado.
+
+    Cada nível funde todos os pares de blocos de uma vez: os blocos da esquerda já
+    estão ordenados, então ``searchsorted`` conta, para cada elemento da direita,
+    quantos da esquerda são maiores. Custo O(n log² n) e memória O(n).
+    """
+    values = np.unique(sequence, return_inverse=True)[1].astype(np.int64)
+    n_values = len(values)
+    span = int(values.max()) + 1 if n_values else 1
+    positions = np.arange(n_values)
+    inversions = 0
+    width = 1
+    while width < n_values:
+        block = positions // (2 * width)
+        is_right = (positions // width) % 2 == 1
+        keys = block * span + values
+        left_counts = np.bincount(block[~is_right], minlength=int(block[-1]) + 1)
+        left_starts = np.concatenate(([0], np.cumsum(left_counts)[:-1]))
+        right_block = block[is_right]
+        not_greater = np.searchsorted(keys[~is_right], keys[is_right], side='right') - left_starts[right_block]
+        inversions += int((left_counts[right_block] - not_greater).sum())
+        values = np.sort(keys) % span
+        width *= 2
+    return inversions
+
+def _tied_pairs(run_starts):
+    """Número de pares empatados, dado o início (True) de cada sequência de valores iguais já ordenados."""
+    run_lengths = np.diff(np.append(np.flatnonzero(run_starts), len(run_starts)))
+    return int((run_lengths * (run_lengths - 1) // 2).sum())
+
+def kendall_tau_b(x_values, y_values):
+    """Tau-b de Kendall por ordenação (algoritmo de Knight), em O(n log² n) e memória O(n)."""
+    n_values = len(x_values)
+    if n_values < 2:
+        return np.nan
+    order = np.lexsort((y_values, x_values))
+    x_sorted, y_by_x = x_values[order], y_values[order]
+    x_changes = np.concatenate(([True], x_sorted[1:] != x_sorted[:-1]))
+    y_changes = np.concatenate(([True], y_by_x[1:] != y_by_x[:-1]))
+    y_sorted = np.sort(y_values)
+
+    total_pairs = n_values * (n_values - 1) // 2
+    x_ties = _tied_pairs(x_changes)
+    y_ties = _tied_pairs(np.concatenate(([True], y_sorted[1:] != y_sorted[:-1])))
+    joint_ties = _tied_pairs(x_changes | y_changes)
+    discordant = _count_inversions(y_by_x)
+    denominator = np.sqrt(float(total_pairs - x_ties) * float(total_pairs - y_ties))
+    if denominator == 0:
+        return np.nan
+    return (total_pairs - x_ties - y_ties + joint_ties - 2 * discordant) / denominator
+
+def _kendall_matrix(values, present_mask):
+    """Tau-b de Kendall entre colunas, um par de colunas por vez sobre as linhas presentes em ambas."""
+    n_cols = values.shape[1]
+    corr = np.full((n_cols, n_cols), np.nan)
+    for i in range(n_cols):
+        for j in range(i, n_cols):
+            rows = present_mask[:, i] & present_mask[:, j]
+            corr[i, j] = corr[j, i] = kendall_tau_b(values[rows, i], values[rows, j])
+    return np.clip(corr, -1.0, 1.0)
+
+def correlation_matrix(values, method='pearson', pairwise=False):
+    """Calcula a matriz de correlação entre colunas de um array (NaN = ausente).
+
+    Com ``pairwise=True`` cada par de colunas usa as linhas em que ambas têm
+    dados; caso contrário, apenas linhas completas. No modo pairwise, os postos
+    de Spearman são calculados por coluna sobre todos os valores disponíveis.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Método de correlação inválido: '{method}'. Use um de {CORRELATION_METHODS}.")
+
+    values = np.asarray(values, dtype=float)
+    if not pairwise:
+        values = values[~np.isnan(values).any(axis=1)]
+    present_mask = ~np.isnan(values)
+
+    if method == 'spearman':
+        values = _rank_columns(values)
+    if method == 'kendall':
+        return _kendall_matrix(values, present_mask)
+    if not pairwise:
+        return _pearson_matrix_complete(values)
+    return _pearson_matrix(values, present_mask)
+
+def compute_year_to_year_correlations(indicator_pivots, min_countries=MIN_COUNTRIES_FOR_CORRELATION,
+                                      method='pearson', pairwise=False):
+    """Correlaciona cada indicador consigo mesmo entre anos, em uma única passada.
+
+    Um país entra no ano apenas se tiver dados de todos os indicadores, e um
+    ano só é considerado com pelo menos ``min_countries`` países. Sem
+    ``pairwise``, usa-se a interseção de países presentes em todos os anos válidos.
+    """
+    if not indicator_pivots or any(pivot_df.empty for pivot_df in indicator_pivots.values()):
+        return None
+
+    # Alinhar todos os indicadores no mesmo eixo País × Ano
+    all_countries = pd.MultiIndex.from_tuples(
+        sorted(set().union(*(pivot_df.index for pivot_df in indicator_pivots.values()))), names=['Code', 'Entity']
+    )
+    all_years = sorted(set().union(*(pivot_df.columns for pivot_df in indicator_pivots.values())))
+    stacked = np.stack([
+        pivot_df.reindex(index=all_countries, columns=all_years).to_numpy(dtype=float)
+        for pivot_df in indicator_pivots.values()
+    ])  # (indicadores, países, anos)
+
+    present_in_all = ~np.isnan(stacked).any(axis=0)
+    valid_years = present_in_all.sum(axis=0) >= min_countries
+    if not valid_years.any():
+        return None
+
+    year_labels = [str(year_val) for year_val in np.asarray(all_years)[valid_years]]
+    present_in_all = present_in_all[:, valid_years]
+    if pairwise:
+        selected_rows = present_in_all.any(axis=1)
+    else:
+        selected_rows = present_in_all.all(axis=1)
+    n_countries = int(selected_rows.sum())
+
+    values = stacked[:, selected_rows][:, :, valid_years]
+    values = np.where(present_in_all[selected_rows], values, np.nan)
+    n_indicators, _, n_years = values.shape
+
+    # Todos os indicadores lado a lado: uma única matriz de correlação, fatiada em blocos diagonais
+    side_by_side = values.transpose(1, 0, 2).reshape(n_countries, n_indicators * n_years)
+    full_corr = correlation_matrix(side_by_side, method=method, pairwise=pairwise) if n_countries else None
+
+    correlations = {}
+    for k, name in enumerate(indicator_pivots):
+        block = slice(k * n_years, (k + 1) * n_years)
+        corr_values = full_corr[block, block] if full_corr is not None else np.empty((n_years, n_years))
+        correlations[name] = pd.DataFrame(corr_values, index=year_labels, columns=year_labels)
+    return correlations, n_countries
+
+def prepare_indicator_correlation_data(indicators, years_range, method='pearson', pairwise=False):
+    """Prepara a correlação ano a ano de vários indicadores, nos países com dados de todos eles.
+
+    ``indicators`` mapeia nome -> (dados, coluna de valor); retorna nome -> matriz,
+    com DataFrame vazio quando os dados são insuficientes.
+    """
     print("Preparando dados para correlação ano a ano...")
-    countries_by_year_data_storage = {}
+    result = compute_year_to_year_correlations(
+        {
+            name: pivot_indicator_by_year(data, value_col, years_range)
+            for name, (data, value_col) in indicators.items()
+        },
+        method=method, pairwise=pairwise
+    )
 
-    for year_val in years_range:
-        # Preparar dados de IDH para o ano atual
-        hdi_year_df = hdi_df[hdi_df['Year'] == year_val].copy()
-        hdi_year_df_filtered = hdi_year_df[hdi_year_df['Code'].notna()].copy()
-        
-        # Preparar dados de Felicidade para o ano atual
-        happiness_year_df = happiness_df[happiness_df['Year'] == year_val].copy()
-        
-        # Mesclar os dados
-        merged_year_df = pd.merge(
-            hdi_year_df_filtered[['Entity', 'Code', 'Human Development Index']], 
-            happiness_year_df[['Entity', 'Code', 'Cantril ladder score']], 
-            on=['Entity', 'Code'], 
-            how='inner'
-        )
-        
-        if len(merged_year_df) >= MIN_COUNTRIES_FOR_CORRELATION:
-            merged_year_df = merged_year_df.rename(columns={
-                'Human Development Index': f'HDI_{year_val}',
-                'Cantril ladder score': f'Happiness_{year_val}'
-            })
-            countries_by_year_data_storage[year_val] = merged_year_df[
-                ['Entity', 'Code', f'HDI_{year_val}', f'Happiness_{year_val}']
-            ]
-
-    if not countries_by_year_data_storage:
+    if result is None:
         print("Aviso: Dados insuficientes para correlações ano a ano.")
-        return pd.DataFrame(), pd.DataFrame()
-
-    # Combinar dados de todos os anos
-    all_years_data_list_dfs = list(countries_by_year_data_storage.values())
-    if not all_years_data_list_dfs:
-        return pd.DataFrame(), pd.DataFrame()
-
-    # Encontrar interseção de países em todos os anos
-    combined_all_years_df = all_years_data_list_dfs[0]
-    for i in range(1, len(all_years_data_list_dfs)):
-        combined_all_years_df = pd.merge(
-            combined_all_years_df, all_years_data_list_dfs[i], on=['Entity', 'Code'], how='inner'
-        )
-    
-    if combined_all_years_df.empty or len(combined_all_years_df) < MIN_COUNTRIES_FOR_CORRELATION:
-        print(f"Aviso: Poucos países comuns ({len(combined_all_years_df)}) para análise robusta.")
-        if combined_all_years_df.empty or len(combined_all_years_df) < 2:
-            return pd.DataFrame(), pd.DataFrame()
-    
-    # Preparar matrizes de correlação
-    hdi_cols = sorted([col for col in combined_all_years_df.columns if 'HDI_' in col])
-    happiness_cols = sorted([col for col in combined_all_years_df.columns if 'Happiness_' in col])
-    
-    hdi_correlation_matrix = pd.DataFrame()
-    if len(hdi_cols) > 1:
-        hdi_correlation_matrix = combined_all_years_df[hdi_cols].corr()
-        hdi_correlation_matrix.columns = [col.replace('HDI_', '') for col in hdi_correlation_matrix.columns]
-        hdi_correlation_matrix.index = [idx.replace('HDI_', '') for idx in hdi_correlation_matrix.index]
-    
-    happiness_correlation_matrix = pd.DataFrame()
-    if len(happiness_cols) > 1:
-        happiness_correlation_matrix = combined_all_years_df[happiness_cols].corr()
-        happiness_correlation_matrix.columns = [col.replace('Happiness_', '') for col in happiness_correlation_matrix.columns]
-        happiness_correlation_matrix.index = [idx.replace('Happiness_', '') for idx in happiness_correlation_matrix.index]
+        return {name: pd.DataFrame() for name in indicators}
 
-    return hdi_correlation_matrix, happiness_correlation_matrix
+    correlations, n_countries = result
+    if n_countries < MIN_COUNTRIES_FOR_CORRELATION:
+        print(f"Aviso: Poucos países comuns ({n_countries}) para análise robusta.")
+        if n_countries < 2:
+            return {name: pd.DataFrame() for name in indicators}
 
-def plot_heatmap_comparison(correlation_matrix_df, title_prefix, colormaps, 
-                           output_filename="heatmap_comparison.png", vmin_val=None, 
-                           vmax_val=None, center_val=None):
-    """Cria heatmaps para matriz de correlação usando diferentes colormaps."""
-    print(f"Criando comparação de heatmaps para '{title_prefix}'...")
-    num_colormaps = len(colormaps)
-    rows = (num_colormaps + 1) // 2
-    cols = 2 if num_colormaps > 1 else 1
+    return {
+        name: correlation_matrix_df if len(correlation_matrix_df) > 1 else pd.DataFrame()
+        for name, correlation_matrix_df in correlations.items()
+    }
 
-    fig, axes = plt.subplots(rows, cols, figsize=(8.5 * cols, 7.5 * rows), 
-                           squeeze=False, constrained_layout=True)
-    axes_flat = axes.flatten()
+def prepare_year_to_year_correlation_data(hdi_df, happiness_df, years_range, method='pearson', pairwise=False):
+    """Prepara dados para correlação ano a ano para IDH e Felicidade."""
+    correlations = prepare_indicator_correlation_data(
+        {
+            'hdi': (hdi_df, DATASET_REGISTRY['hdi']['value_col']),
+            'happiness': (happiness_df, DATASET_REGISTRY['happiness']['value_col']),
+        },
+        years_range, method=method, pairwise=pairwise
+    )
+    return correlations['hdi'], correlations['happiness']
 
-    # Ajustar vmin e vmax
+def _heatmap_color_limits(correlation_matrix_df, vmin_val, vmax_val, center_val):
+    """Ajusta vmin e vmax do heatmap quando não informados."""
     if vmin_val is None and center_val is None and not correlation_matrix_df.empty:
         if len(correlation_matrix_df) > 1:
-            actual_min = correlation_matrix_df.min().min()
-            actual_max = correlation_matrix_df.max().max()
+            matrix_values = correlation_matrix_df.to_numpy(dtype=float)
+            actual_min = np.nanmin(matrix_values)
+            actual_max = np.nanmax(matrix_values)
             _vmin_val = max(0, actual_min * 0.98 if actual_min > 0 else actual_min * 1.02)
             _vmax_val = min(1.0, actual_max * 1.02 if actual_max > 0 else actual_max * 0.98)
             
@@ -335,6 +1224,135 @@ def plot_heatmap_comparison(correlation_matrix_df, title_prefix, colormaps,
     else:
         _vmin_val = vmin_val
         _vmax_val = vmax_val
+    return _vmin_val, _vmax_val
+
+def cluster_order(matrix_values):
+    """Ordem espectral das linhas de uma matriz de correlação (vetor de Fiedler), agrupando as semelhantes."""
+    affinity = np.nan_to_num((matrix_values + matrix_values.T) / 4 + 0.5, nan=0.0)
+    laplacian = np.diag(affinity.sum(axis=1)) - affinity
+    _, eigenvectors = np.linalg.eigh(laplacian)
+    return np.argsort(eigenvectors[:, 1], kind='stable')
+
+def decimate_matrix(matrix_values, max_cells=None):
+    """Reduz a matriz pela média de blocos (ignorando NaN) até no máximo ``max_cells`` linhas e colunas.
+
+    Sem ``max_cells``, usa ``HEATMAP_MAX_DISPLAY_CELLS``. Retorna (matriz reduzida, passo das linhas,
+    passo das colunas).
+    """
+    max_cells = max_cells or HEATMAP_MAX_DISPLAY_CELLS
+    n_rows, n_cols = matrix_values.shape
+    row_step = -(-n_rows // max_cells)
+    col_step = -(-n_cols // max_cells)
+    if row_step == 1 and col_step == 1:
+        return matrix_values, 1, 1
+    out_rows = -(-n_rows // row_step)
+    out_cols = -(-n_cols // col_step)
+    padded = np.full((out_rows * row_step, out_cols * col_step), np.nan)
+    padded[:n_rows, :n_cols] = matrix_values
+    blocks = padded.reshape(out_rows, row_step, out_cols, col_step)
+    valid = np.isfinite(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0.0).sum(axis=(1, 3))
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan), row_step, col_step
+
+def _tick_positions(n_cells, max_ticks=None):
+    """Posições de rótulos igualmente espaçadas, no máximo ``max_ticks`` (padrão ``HEATMAP_MAX_TICKS``) por eixo."""
+    max_ticks = max_ticks or HEATMAP_MAX_TICKS
+    return np.arange(0, n_cells, -(-n_cells // max_ticks))
+
+def _plot_heatmap_image(correlation_matrix_df, title_prefix, colormaps, output_filename,
+                        vmin_val=None, vmax_val=None, center_val=None, reorder=None, cvd_preview=False):
+    """Versão de ``plot_heatmap_comparison`` para matrizes grandes: uma imagem por painel, sem anotações.
+
+    A matriz é reordenada (opcional) e reduzida uma única vez; o custo de cada
+    painel depende de ``HEATMAP_MAX_DISPLAY_CELLS``, não do tamanho da matriz.
+    """
+    print(f"Criando comparação de heatmaps para '{title_prefix}' "
+          f"(matriz {correlation_matrix_df.shape[0]}x{correlation_matrix_df.shape[1]}, modo imagem)...")
+    matrix_values = correlation_matrix_df.to_numpy(dtype=float)
+    row_labels = np.asarray(correlation_matrix_df.index, dtype=str)
+    col_labels = np.asarray(correlation_matrix_df.columns, dtype=str)
+    reorder = HEATMAP_CLUSTER_REORDER if reorder is None else reorder
+    if reorder and matrix_values.shape[0] == matrix_values.shape[1]:
+        order = cluster_order(matrix_values)
+        matrix_values = matrix_values[np.ix_(order, order)]
+        row_labels, col_labels = row_labels[order], col_labels[order]
+
+    display_values, row_step, col_step = decimate_matrix(matrix_values)
+    if row_step > 1 or col_step > 1:
+        print(f"  Reduzida para {display_values.shape[0]}x{display_values.shape[1]} (média de blocos).")
+    row_labels, col_labels = row_labels[::row_step], col_labels[::col_step]
+
+    _vmin_val, _vmax_val = _heatmap_color_limits(correlation_matrix_df, vmin_val, vmax_val, center_val)
+    if _vmin_val is None:
+        _vmin_val = np.nanmin(display_values)
+    if _vmax_val is None:
+        _vmax_val = np.nanmax(display_values)
+    if center_val is not None:
+        # Mesmo efeito do `center` do Seaborn: faixa simétrica em torno do centro
+        half_range = max(_vmax_val - center_val, center_val - _vmin_val)
+        heatmap_norm = matplotlib.colors.Normalize(center_val - half_range, center_val + half_range)
+    else:
+        heatmap_norm = matplotlib.colors.Normalize(_vmin_val, _vmax_val)
+
+    num_colormaps = len(colormaps)
+    rows = (num_colormaps + 1) // 2
+    cols = 2 if num_colormaps > 1 else 1
+    fig, axes = plt.subplots(rows, cols, figsize=(8.5 * cols, 7.5 * rows),
+                             squeeze=False, constrained_layout=True)
+    axes_flat = axes.flatten()
+    row_ticks = _tick_positions(len(row_labels))
+    col_ticks = _tick_positions(len(col_labels))
+
+    for i, (name, cmap_obj) in enumerate(colormaps.items()):
+        ax = axes_flat[i]
+        heatmap_image = ax.imshow(
+            np.ma.masked_invalid(display_values), cmap=cmap_obj, norm=heatmap_norm,
+            aspect='auto', interpolation='nearest'
+        )
+        ax.set_title(f"{title_prefix} - {COLORMAP_NAMES.get(name, name.capitalize())}",
+                     fontsize=TITLE_FONTSIZE, pad=15)
+        ax.set_yticks(row_ticks, row_labels[row_ticks])
+        ax.set_xticks(col_ticks, col_labels[col_ticks], rotation=45, ha='right')
+        ax.tick_params(axis='both', labelsize=LABEL_FONTSIZE-1)
+        ax.grid(False)
+        cbar = fig.colorbar(heatmap_image, ax=ax, shrink=0.8, aspect=30)
+        cbar.ax.tick_params(labelsize=LABEL_FONTSIZE-1)
+
+    # Ocultar subplots não utilizados
+    for j in range(i + 1, len(axes_flat)):
+        fig.delaxes(axes_flat[j])
+
+    save_figure(output_filename, cvd_preview)
+    plt.close(fig)
+    print(f"Comparação de heatmaps salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
+
+def plot_heatmap_comparison(correlation_matrix_df, title_prefix, colormaps, 
+                           output_filename="heatmap_comparison.png", vmin_val=None, 
+                           vmax_val=None, center_val=None, reorder=None, cvd_preview=False):
+    """Cria heatmaps para matriz de correlação usando diferentes colormaps.
+
+    Matrizes com mais de ``HEATMAP_ANNOT_MAX_CELLS`` células vão para o modo imagem
+    (sem anotações, com redução e reordenação opcional).
+    """
+    if correlation_matrix_df.size > HEATMAP_ANNOT_MAX_CELLS:
+        return _plot_heatmap_image(correlation_matrix_df, title_prefix, colormaps, output_filename,
+                                   vmin_val, vmax_val, center_val, reorder, cvd_preview)
+    _require_seaborn()
+    # O recentramento do Seaborn (center) altera o colormap, então só o modo completo o suporta
+    if RENDER_MODE == 'recolor' and center_val is None:
+        return _plot_heatmap_recolored(correlation_matrix_df, title_prefix, colormaps,
+                                       output_filename, vmin_val, vmax_val, cvd_preview)
+    print(f"Criando comparação de heatmaps para '{title_prefix}'...")
+    num_colormaps = len(colormaps)
+    rows = (num_colormaps + 1) // 2
+    cols = 2 if num_colormaps > 1 else 1
+
+    fig, axes = plt.subplots(rows, cols, figsize=(8.5 * cols, 7.5 * rows), 
+                           squeeze=False, constrained_layout=True)
+    axes_flat = axes.flatten()
+
+    _vmin_val, _vmax_val = _heatmap_color_limits(correlation_matrix_df, vmin_val, vmax_val, center_val)
 
     for i, (name, cmap_obj) in enumerate(colormaps.items()):
         ax = axes_flat[i]
@@ -353,108 +1371,1745 @@ def plot_heatmap_comparison(correlation_matrix_df, title_prefix, colormaps,
     for j in range(i + 1, len(axes_flat)):
         fig.delaxes(axes_flat[j])
 
-    plt.savefig(os.path.join(OUTPUT_DIR, output_filename), dpi=DEFAULT_DPI)
+    save_figure(output_filename, cvd_preview)
     plt.close(fig)
     print(f"Comparação de heatmaps salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
 
-# --- Função Principal ---
-def main():
-    """Função principal que orquestra o fluxo de trabalho."""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    install_missing_packages()
-    colormaps_dict = load_colormaps()
-    hdi_data_df, happiness_data_df, life_expectancy_data_df = load_datasets()
-    hdi_countries_latest_df = prepare_hdi_data(hdi_data_df, TARGET_YEAR_HDI)
-    
-    # 1. Comparação de gradientes
-    plot_gradients_comparison(colormaps_dict)
-
-    # 2. Gráficos de barras para IDH
-    if not hdi_countries_latest_df.empty:
-        min_hdi_val = hdi_countries_latest_df['Human Development Index'].min()
-        max_hdi_val = hdi_countries_latest_df['Human Development Index'].max()
-        xlim_hdi_bars = (min_hdi_val * 0.98, max_hdi_val * 1.02)
-
-        plot_bar_chart_comparison(
-            data_df=hdi_countries_latest_df, 
-            value_col='Human Development Index', 
-            label_col='Entity',
-            title_prefix=f'Índice de Desenvolvimento Humano ({TARGET_YEAR_HDI})', 
-            colormaps=colormaps_dict,
-            output_filename="hdi_barplots_comparison.png", 
-            xlim_range=xlim_hdi_bars
-        )
-    else:
-        print(f"Pulando gráficos de barras: sem dados para {TARGET_YEAR_HDI}")
+# --- Renderização Recolorível ---
+RECOLOR_LUT_SIZE = 256  # O índice da LUT é codificado no canal vermelho da camada de índices
 
-    # 3. Gráficos de dispersão (IDH vs. Expectativa de Vida)
-    life_exp_df = life_expectancy_data_df[
-        life_expectancy_data_df['Year'] == TARGET_YEAR_LIFE_EXPECTANCY
-    ].copy()
-    
-    if not hdi_countries_latest_df.empty and not life_exp_df.empty:
-        merged_df = pd.merge(
-            hdi_countries_latest_df, 
-            life_exp_df, 
-            on=['Entity', 'Code'],
-            suffixes=('_hdi', '_le'),
-            how='inner'
+def colormap_index_lut(name, cmap_obj):
+    """LUT uint8 (256, 4) na mesma indexação usada pelo Matplotlib para um colormap de 256 cores."""
+    index_positions = (np.arange(RECOLOR_LUT_SIZE) + 0.5) / RECOLOR_LUT_SIZE
+    return np.round(sample_colormap(name, cmap_obj, index_positions) * 255).astype(np.uint8)
+
+def _index_colormap():
+    """Colormap cujo canal vermelho é o próprio índice da LUT (sem transparência)."""
+    index_colors = np.zeros((RECOLOR_LUT_SIZE, 4))
+    index_colors[:, 0] = np.arange(RECOLOR_LUT_SIZE) / 255
+    index_colors[:, 3] = 1.0
+    index_cmap = ListedColormap(index_colors)
+    index_cmap.set_bad((0, 0, 0, 0))
+    return index_cmap
+
+def _composite_over(dst_rgb, src_rgba):
+    """Composição "over" (no próprio ``dst_rgb``, float32) de uma camada RGBA com alfa não pré-multiplicado."""
+    src_alpha = src_rgba[..., 3:4].astype(np.float32) / 255
+    dst_rgb += (src_rgba[..., :3].astype(np.float32) - dst_rgb) * src_alpha
+    return dst_rgb
+
+def render_recolored_variants(fig, variant_luts, variant_artists=(), update_variant=None):
+    """Rasteriza a geometria de uma figura uma vez e gera uma imagem por LUT.
+
+    A figura é decomposta em camadas: fundo (artistas abaixo dos mapeados),
+    buffer de índices (artistas com colormap desenhados com um colormap de
+    índices, sem suavização), frente (artistas acima) e uma camada por variante
+    com os artistas que mudam a cada colormap (títulos, anotações), atualizados
+    por ``update_variant(i)``. Cada variante custa um lookup vetorizado na LUT
+    e a composição das camadas. Retorna imagens RGB uint8 (H, W, 3).
+    """
+    fig.set_dpi(DEFAULT_DPI)
+    fig.canvas.draw()  # Desenho completo: fixa layout, ticks e posição dos títulos
+    renderer = fig.canvas.get_renderer()
+
+    variant_ids = {id(artist) for artist in variant_artists}
+    below_artists, above_artists, mappables = [], [], []
+    for ax in fig.axes:
+        ax_children = sorted(
+            (child for child in ax.get_children()
+             if child is not ax.patch and child.get_visible() and id(child) not in variant_ids),
+            key=lambda child: child.get_zorder()
         )
-        
-        original_life_col = 'Period life expectancy at birth - Sex: total - Age: 0'
-        new_life_col = 'Expectativa de Vida (anos)'
-        
-        if original_life_col in merged_df.columns:
-            merged_df = merged_df.rename(columns={original_life_col: new_life_col})
-        
-        if not merged_df.empty and new_life_col in merged_df.columns:
-            plot_scatter_comparison(
-                data_df=merged_df, 
-                x_col='Human Development Index', 
-                y_col=new_life_col,
-                color_val_col='Human Development Index',
-                title_prefix=f'IDH vs. Expectativa de Vida ({TARGET_YEAR_HDI}/{TARGET_YEAR_LIFE_EXPECTANCY})',
-                colormaps=colormaps_dict, 
-                output_filename="hdi_life_expectancy_scatter_comparison.png"
-            )
+        ax_mappables = [child for child in ax_children
+                        if isinstance(child, ScalarMappable) and child.get_array() is not None]
+        mappable_zorder = min((child.get_zorder() for child in ax_mappables), default=np.inf)
+        below_artists.append(ax.patch)
+        below_artists.extend(child for child in ax_children
+                             if child.get_zorder() < mappable_zorder and child not in ax_mappables)
+        above_artists.extend(child for child in ax_children
+                             if child.get_zorder() >= mappable_zorder and child not in ax_mappables)
+        mappables.extend(ax_mappables)
+    above_artists.extend(text for text in fig.texts if id(text) not in variant_ids)
+    mesh_mappables = [artist for artist in mappables if isinstance(artist, QuadMesh)]
+
+    def draw_layer(artists, with_background=False):
+        # Desenho direto no renderer: sem relayout nem reposicionamento de títulos
+        renderer.clear()
+        if with_background:
+            fig.patch.draw(renderer)
+        for artist in artists:
+            artist.draw(renderer)
+        return np.asarray(renderer.buffer_rgba()).copy()
+
+    background_rgb = draw_layer(below_artists, with_background=True)[..., :3].astype(np.float32)
+
+    # Camada da frente: malhas (heatmap) contribuem apenas com as bordas das células
+    saved_styles = [(artist, artist.get_cmap(), artist.get_alpha()) for artist in mappables]
+    transparent_cmap = ListedColormap(np.zeros((RECOLOR_LUT_SIZE, 4)))
+    for mesh in mesh_mappables:
+        mesh.set_cmap(transparent_cmap)
+    foreground_rgba = draw_layer(mesh_mappables + above_artists)
+
+    # Buffer de índices: canal vermelho = posição na LUT, alfa = cobertura
+    saved_edges = [(mesh, mesh.get_edgecolor(), mesh.get_antialiased()) for mesh in mesh_mappables]
+    index_cmap = _index_colormap()
+    for artist in mappables:
+        artist.set_cmap(index_cmap)
+        artist.set_alpha(None)
+    for mesh in mesh_mappables:
+        mesh.set_edgecolor('none')
+        mesh.set_antialiased(False)
+    index_rgba = draw_layer(mappables)
+    for artist, cmap_obj, alpha in saved_styles:
+        artist.set_cmap(cmap_obj)
+        artist.set_alpha(alpha)
+    for mesh, edgecolor, antialiased in saved_edges:
+        mesh.set_edgecolor(edgecolor)
+        mesh.set_antialiased(antialiased)
+
+    # Pixels cobertos pelos artistas mapeados: só eles mudam entre variantes. No
+    # interior (cobertura total, nada à frente) a cor final é a própria LUT;
+    # apenas as bordas suavizadas precisam de composição.
+    image_shape = index_rgba.shape[:2] + (3,)
+    flat_index = index_rgba.reshape(-1, 4)
+    flat_foreground = foreground_rgba.reshape(-1, 4)
+    interior_mask = (flat_index[:, 3] == 255) & (flat_foreground[:, 3] == 0)
+    interior_idx = np.flatnonzero(interior_mask)
+    edge_idx = np.flatnonzero((flat_index[:, 3] > 0) & ~interior_mask)
+    interior_lut_idx = flat_index[interior_idx, 0]
+    edge_lut_idx = flat_index[edge_idx, 0]
+    edge_alpha = flat_index[edge_idx, 3:4].astype(np.float32) / 255
+    edge_background = background_rgb.reshape(-1, 3)[edge_idx]
+    edge_foreground = flat_foreground[edge_idx]
+
+    static_rgb = _composite_over(background_rgb.copy(), foreground_rgba)
+    static_uint8 = np.clip(static_rgb + 0.5, 0, 255).astype(np.uint8).reshape(-1, 3)
+
+    variant_images = []
+    for i, lut in enumerate(variant_luts):
+        variant_uint8 = static_uint8.copy()
+        if (lut[:, 3] == 255).all():
+            variant_uint8[interior_idx] = lut[interior_lut_idx, :3]
+            composite_idx, composite_lut_idx = edge_idx, edge_lut_idx
+            composite_alpha, composite_background, composite_foreground = edge_alpha, edge_background, edge_foreground
         else:
-            print("Pulando gráficos de dispersão: dados mesclados insuficientes")
+            composite_idx = np.concatenate([interior_idx, edge_idx])
+            composite_lut_idx = np.concatenate([interior_lut_idx, edge_lut_idx])
+            composite_alpha = np.concatenate([np.ones((len(interior_idx), 1), np.float32), edge_alpha])
+            composite_background = np.concatenate([background_rgb.reshape(-1, 3)[interior_idx], edge_background])
+            composite_foreground = np.concatenate([flat_foreground[interior_idx], edge_foreground])
+
+        mapped_rgba = lut[composite_lut_idx]
+        mapped_alpha = mapped_rgba[:, 3:4].astype(np.float32) / 255 * composite_alpha
+        composite_rgb = composite_background + (mapped_rgba[:, :3] - composite_background) * mapped_alpha
+        composite_rgb = _composite_over(composite_rgb, composite_foreground)
+        variant_uint8[composite_idx] = np.clip(composite_rgb + 0.5, 0, 255).astype(np.uint8)
+
+        if variant_artists:
+            if update_variant is not None:
+                update_variant(i)
+            variant_rgba = draw_layer(variant_artists).reshape(-1, 4)
+            text_idx = np.flatnonzero(variant_rgba[:, 3])
+            text_rgb = _composite_over(variant_uint8[text_idx].astype(np.float32), variant_rgba[text_idx])
+            variant_uint8[text_idx] = np.clip(text_rgb + 0.5, 0, 255).astype(np.uint8)
+        variant_images.append(variant_uint8.reshape(image_shape))
+    return variant_images
+
+def _save_tiled_panels(panel_images, n_cols, output_path, cvd_preview=False):
+    """Monta os painéis em grade (fundo branco) e salva como PNG (e, opcionalmente, a prévia de daltonismo)."""
+    _require_pillow()
+    n_rows = -(-len(panel_images) // n_cols)
+    panel_height, panel_width = panel_images[0].shape[:2]
+    sheet = np.full((n_rows * panel_height, n_cols * panel_width, 3), 255, dtype=np.uint8)
+    for i, panel in enumerate(panel_images):
+        row, col = divmod(i, n_cols)
+        sheet[row * panel_height:(row + 1) * panel_height, col * panel_width:(col + 1) * panel_width] = panel
+    Image.fromarray(sheet).save(output_path, dpi=(DEFAULT_DPI, DEFAULT_DPI))
+    if EXPORT_FORMATS or EXPORT_TILES:
+        export_figure(sheet, os.path.basename(output_path))
+    if cvd_preview:
+        save_cvd_preview(sheet, os.path.basename(output_path))
+
+def _plot_gradients_recolored(colormaps, output_filename):
+    """Versão recolorível de ``plot_gradients_comparison``."""
+    print("Criando comparação de gradientes (modo recolorível)...")
+    gradient_data = np.linspace(0, 1, 256).reshape(1, -1)
+    gradient_image = np.vstack((gradient_data, gradient_data))
+    names = list(colormaps)
+
+    fig, ax = plt.subplots(figsize=(12, 2.5), constrained_layout=True)
+    ax.imshow(gradient_image, aspect='auto', cmap=colormaps[names[0]])
+    title = ax.set_title("", fontsize=TITLE_FONTSIZE)
+    ax.set_yticks([])
+    ax.set_xticks([0, 63, 127, 191, 255])
+    ax.set_xticklabels(['0.0', '0.25', '0.5', '0.75', '1.0'], fontsize=LABEL_FONTSIZE)
+
+    def update_variant(i):
+        title.set_text(f"Gradiente de Cor - {COLORMAP_NAMES.get(names[i], names[i].capitalize())}")
+
+    update_variant(0)
+    panels = render_recolored_variants(
+        fig, [colormap_index_lut(name, colormaps[name]) for name in names], [title], update_variant
+    )
+    plt.close(fig)
+    _save_tiled_panels(panels, 1, os.path.join(OUTPUT_DIR, output_filename))
+    print(f"Comparação de gradientes salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
+
+def _plot_grayscale_recolored(colormaps, output_filename):
+    """Versão recolorível de ``plot_grayscale_comparison``: a versão cinza é apenas outra LUT."""
+    print("Criando comparação de versões em escala de cinza (modo recolorível)...")
+    gradient_data = np.linspace(0, 1, 256).reshape(1, -1)
+    gradient_image = np.vstack((gradient_data, gradient_data))
+
+    variant_luts, variant_titles = [], []
+    for name, cmap_obj in colormaps.items():
+        display_name = COLORMAP_NAMES.get(name, name.capitalize())
+        color_lut = colormap_index_lut(name, cmap_obj)
+        gray_values = rgb_to_grayscale_values(color_lut[:, :3] / 255)
+        gray_lut = color_lut.copy()
+        gray_lut[:, :3] = np.round(gray_values * 255).astype(np.uint8)[:, None]
+        variant_luts.extend([color_lut, gray_lut])
+        variant_titles.extend([display_name, f"{display_name} (Escala de Cinza)"])
+
+    fig, ax = plt.subplots(figsize=(5, 3.5), constrained_layout=True)
+    ax.imshow(gradient_image, aspect='auto', cmap=next(iter(colormaps.values())))
+    title = ax.set_title(variant_titles[0], fontsize=TITLE_FONTSIZE-1)
+    ax.set_yticks([])
+    ax.set_xticks([])
+
+    panels = render_recolored_variants(
+        fig, variant_luts, [title], lambda i: title.set_text(variant_titles[i])
+    )
+    plt.close(fig)
+    _save_tiled_panels(panels, 2, os.path.join(OUTPUT_DIR, output_filename))
+    print(f"Comparação em escala de cinza salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
+
+def _plot_heatmap_recolored(correlation_matrix_df, title_prefix, colormaps, output_filename,
+                            vmin_val=None, vmax_val=None, cvd_preview=False):
+    """Versão recolorível de ``plot_heatmap_comparison``.
+
+    As anotações mudam de cor conforme a luminância da célula (mesma regra do
+    Seaborn), por isso são redesenhadas na camada de cada variante.
+    """
+    print(f"Criando comparação de heatmaps para '{title_prefix}' (modo recolorível)...")
+    names = list(colormaps)
+    _vmin_val, _vmax_val = _heatmap_color_limits(correlation_matrix_df, vmin_val, vmax_val, None)
+
+    fig, ax = plt.subplots(figsize=(8.5, 7.5), constrained_layout=True)
+    sns.heatmap(
+        correlation_matrix_df, annot=True, fmt=".2f", cmap=colormaps[names[0]], ax=ax,
+        vmin=_vmin_val, vmax=_vmax_val,
+        annot_kws={"size": ANNOT_FONTSIZE}, linewidths=.5, linecolor='gray',
+        cbar_kws={"shrink": 0.8, "aspect": 30}
+    )
+    title = ax.set_title("", fontsize=TITLE_FONTSIZE, pad=15)
+    rotation = 45 if correlation_matrix_df.shape[0] > 5 else 0
+    ax.tick_params(axis='both', labelsize=LABEL_FONTSIZE-1, rotation=rotation)
+
+    # Índice da LUT de cada célula anotada (células mascaradas não recebem texto)
+    mesh = next(child for child in ax.collections if isinstance(child, QuadMesh))
+    cell_values = mesh.get_array()
+    cell_positions = np.ma.filled(mesh.norm(cell_values), np.nan)[~np.ma.getmaskarray(cell_values)]
+    cell_lut_idx = np.clip(np.floor(cell_positions * RECOLOR_LUT_SIZE), 0, RECOLOR_LUT_SIZE - 1).astype(int)
+    annotations = list(ax.texts)
+    variant_luts = [colormap_index_lut(name, colormaps[name]) for name in names]
+
+    def update_variant(i):
+        title.set_text(f"{title_prefix} - {COLORMAP_NAMES.get(names[i], names[i].capitalize())}")
+        cell_luminance = rgb_to_relative_luminance(variant_luts[i][cell_lut_idx] / 255)
+        for text, luminance in zip(annotations, cell_luminance):
+            text.set_color(".15" if luminance > .408 else "w")
+
+    update_variant(0)
+    panels = render_recolored_variants(fig, variant_luts, [title, *annotations], update_variant)
+    plt.close(fig)
+    _save_tiled_panels(panels, 2 if len(panels) > 1 else 1, os.path.join(OUTPUT_DIR, output_filename),
+                       cvd_preview)
+    print(f"Comparação de heatmaps salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
+
+# --- Análise de Uniformidade Perceptual ---
+# Conversões em lote: arrays de forma (..., 3), com RGB em [0, 1]
+SRGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041)
+)
+WHITE_POINT_D65 = (95.047, 100.0, 108.883)
+CAT02 = (
+    (0.7328, 0.4296, -0.1624),
+    (-0.7036, 1.6975, 0.0061),
+    (0.0030, 0.0136, 0.9834)
+)
+HUNT_POINTER_ESTEVEZ = (
+    (0.38971, 0.68898, -0.07868),
+    (-0.22981, 1.18340, 0.04641),
+    (0.00000, 0.00000, 1.00000)
+)
+# Condições de visualização sRGB padrão: surround médio, Y_b = 20, L_A = 64/π/5 cd/m²
+CAM02_ADAPTING_LUMINANCE = 64 / math.pi / 5
+CAM02_BACKGROUND_LUMINANCE = 20.0
+CAM02_SURROUND = (1.0, 0.69, 1.0)  # F, c, N_c
+
+def srgb_to_xyz(rgb):
+    """Converte sRGB em [0, 1] para XYZ (D65, escala 0-100)."""
+    rgb = np.asarray(rgb, dtype=float)[..., :3]
+    return 100.0 * srgb_to_linear(rgb) @ np.asarray(SRGB_TO_XYZ).T
+
+def xyz_to_cielab(xyz):
+    """Converte XYZ (D65, escala 0-100) para CIELAB."""
+    scaled = xyz / np.asarray(WHITE_POINT_D65)
+    delta = 6 / 29
+    f = np.where(scaled > delta ** 3, np.cbrt(scaled), scaled / (3 * delta ** 2) + 4 / 29)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2])
+    ], axis=-1)
+
+def _cam02_post_adaptation(rgb_adapted, luminance_factor):
+    """Compressão não linear pós-adaptação do CIECAM02 (preserva o sinal)."""
+    scaled = (luminance_factor * np.abs(rgb_adapted) / 100) ** 0.42
+    return np.sign(rgb_adapted) * 400 * scaled / (scaled + 27.13) + 0.1
+
+def xyz_to_cam02ucs(xyz):
+    """Converte XYZ (D65, escala 0-100) para CAM02-UCS (J', a', b')."""
+    surround_f, surround_c, surround_nc = CAM02_SURROUND
+    adapting_luminance = CAM02_ADAPTING_LUMINANCE
+    cat02, white_point = np.asarray(CAT02), np.asarray(WHITE_POINT_D65)
+
+    # Adaptação cromática (CAT02) com grau de adaptação D
+    degree = surround_f * (1 - (1 / 3.6) * np.exp((-adapting_luminance - 42) / 92))
+    degree = np.clip(degree, 0, 1)
+    rgb_white = cat02 @ white_point
+    adaptation_gain = white_point[1] * degree / rgb_white + 1 - degree
+
+    k = 1 / (5 * adapting_luminance + 1)
+    luminance_factor = (0.2 * k ** 4 * 5 * adapting_luminance
+                        + 0.1 * (1 - k ** 4) ** 2 * np.cbrt(5 * adapting_luminance))
+    n = CAM02_BACKGROUND_LUMINANCE / white_point[1]
+    n_bb = 0.725 * n ** -0.2
+    z = 1.48 + np.sqrt(n)
+
+    to_hpe = np.asarray(HUNT_POINTER_ESTEVEZ) @ np.linalg.inv(cat02)
+    white_hpe = _cam02_post_adaptation(to_hpe @ (adaptation_gain * rgb_white), luminance_factor)
+    achromatic_white = (2 * white_hpe[0] + white_hpe[1] + white_hpe[2] / 20 - 0.305) * n_bb
+
+    # Matriz combinada: XYZ -> CAT02 -> ganho de adaptação -> Hunt-Pointer-Estévez
+    xyz_to_hpe = to_hpe @ np.diag(adaptation_gain) @ cat02
+    rgb_a = _cam02_post_adaptation(xyz @ xyz_to_hpe.T, luminance_factor)
+    r_a, g_a, b_a = rgb_a[..., 0], rgb_a[..., 1], rgb_a[..., 2]
+
+    opponent_a = r_a - 12 * g_a / 11 + b_a / 11
+    opponent_b = (r_a + g_a - 2 * b_a) / 9
+    hue = np.arctan2(opponent_b, opponent_a)
+    eccentricity = 0.25 * (np.cos(hue + 2) + 3.8)
+
+    achromatic = (2 * r_a + g_a + b_a / 20 - 0.305) * n_bb
+    lightness = 100 * np.maximum(achromatic / achromatic_white, 0) ** (surround_c * z)
+    t = (50000 / 13 * surround_nc * n_bb * eccentricity * np.hypot(opponent_a, opponent_b)
+         / (r_a + g_a + 21 / 20 * b_a))
+    chroma = t ** 0.9 * np.sqrt(lightness / 100) * (1.64 - 0.29 ** n) ** 0.73
+    colorfulness = chroma * luminance_factor ** 0.25
+
+    # Espaço uniforme CAM02-UCS (Luo et al., 2006)
+    lightness_ucs = 1.7 * lightness / (1 + 0.007 * lightness)
+    colorfulness_ucs = np.log1p(0.0228 * colorfulness) / 0.0228
+    return np.stack([
+        lightness_ucs,
+        colorfulness_ucs * np.cos(hue),
+        colorfulness_ucs * np.sin(hue)
+    ], axis=-1)
+
+def perceptual_uniformity_metrics(rgb_batch):
+    """Calcula métricas perceptuais para um lote de LUTs de forma (colormaps, amostras, 3+).
+
+    Retorna um dicionário de arrays com um valor por colormap: ΔE por passo
+    (CIE76 em CIELAB e euclidiano em CAM02-UCS), monotonicidade da luminosidade
+    e um escore de uniformidade (1 - coeficiente de variação do ΔE em CAM02-UCS).
+    """
+    xyz = srgb_to_xyz(rgb_batch)
+    lab = xyz_to_cielab(xyz)
+    ucs = xyz_to_cam02ucs(xyz)
+
+    delta_e_lab = np.linalg.norm(np.diff(lab, axis=1), axis=-1)
+    delta_e_ucs = np.linalg.norm(np.diff(ucs, axis=1), axis=-1)
+
+    lightness_steps = np.diff(lab[..., 0], axis=1)
+    overall_direction = np.sign(lab[:, -1, 0] - lab[:, 0, 0])[:, None]
+    # Passos que não contrariam a direção geral da luminosidade (tolerância numérica)
+    monotonic_steps = (lightness_steps * overall_direction) >= -1e-6
+    if lightness_steps.shape[1] == 0:
+        monotonic_fraction = np.ones(len(lab))
     else:
-        print("Pulando gráficos de dispersão: falta de dados para os anos alvo")
+        monotonic_fraction = monotonic_steps.mean(axis=1)
 
-    # 4. Comparação em escala de cinza
-    plot_grayscale_comparison(colormaps_dict)
-    
-    # 5. Heatmap de correlação ano a ano (Felicidade)
-    hdi_corr_years_df, happiness_corr_years_df = prepare_year_to_year_correlation_data(
-        hdi_data_df, happiness_data_df, YEARS_FOR_CORRELATION
+    mean_delta_ucs = delta_e_ucs.mean(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variation_ucs = delta_e_ucs.std(axis=1) / mean_delta_ucs
+
+    return {
+        'L* inicial': lab[:, 0, 0],
+        'L* final': lab[:, -1, 0],
+        'ΔE Lab médio': delta_e_lab.mean(axis=1),
+        'ΔE Lab máximo': delta_e_lab.max(axis=1),
+        'ΔE CAM02-UCS médio': mean_delta_ucs,
+        'ΔE CAM02-UCS máximo': delta_e_ucs.max(axis=1),
+        'Comprimento perceptual (CAM02-UCS)': delta_e_ucs.sum(axis=1),
+        'Monotonicidade L*': monotonic_fraction,
+        'L* monotônico': monotonic_fraction == 1.0,
+        'Uniformidade': np.clip(1 - variation_ucs, 0, 1),
+    }
+
+def analyze_colormaps_perceptual(colormaps, output_filename="colormap_perceptual_metrics.csv", n_samples=None):
+    """Gera a tabela de métricas perceptuais dos colormaps, ordenada por uniformidade.
+
+    Cada colormap é amostrado em ``n_samples`` pontos (padrão: PERCEPTUAL_SAMPLES),
+    independentemente do tamanho da sua LUT, e todos são processados em um único lote.
+    """
+    print("Analisando uniformidade perceptual dos colormaps...")
+    _require_pandas()
+    n_samples = n_samples or PERCEPTUAL_SAMPLES
+    names = list(colormaps)
+    batch_rgb = np.stack([resample_colormap(name, cmap_obj, n_samples)[:, :3]
+                          for name, cmap_obj in colormaps.items()])
+    batch_metrics = perceptual_uniformity_metrics(batch_rgb)
+    metrics_rows = {name: {metric: values[i] for metric, values in batch_metrics.items()}
+                    for i, name in enumerate(names)}
+
+    metrics_df = pd.DataFrame.from_dict(metrics_rows, orient='index')
+    metrics_df.index = [COLORMAP_NAMES.get(name, name.capitalize()) for name in metrics_df.index]
+    metrics_df.index.name = 'Colormap'
+    metrics_df = metrics_df.sort_values('Uniformidade', ascending=False)
+
+    metrics_df.to_csv(os.path.join(OUTPUT_DIR, output_filename), float_format='%.4f')
+    print(f"Métricas perceptuais salvas em: {os.path.join(OUTPUT_DIR, output_filename)}")
+    return metrics_df
+
+# --- Simulação de Daltonismo (CVD) ---
+# Matrizes de Machado et al. (2009) para RGB linear, tabeladas por severidade de 0.0 a 1.0
+CVD_MACHADO_MATRICES = {
+    'protan': [
+        [[1.000000, 0.000000, 0.000000], [0.000000, 1.000000, 0.000000], [0.000000, 0.000000, 1.000000]],  # 0.0
+        [[0.856167, 0.182038, -0.038205], [0.029342, 0.955115, 0.015544], [-0.002880, -0.001563, 1.004443]],  # 0.1
+        [[0.734766, 0.334872, -0.069637], [0.051840, 0.919198, 0.028963], [-0.004928, -0.004209, 1.009137]],  # 0.2
+        [[0.630323, 0.465641, -0.095964], [0.069181, 0.890046, 0.040773], [-0.006308, -0.007724, 1.014032]],  # 0.3
+        [[0.539009, 0.579343, -0.118352], [0.082546, 0.866121, 0.051332], [-0.007136, -0.011959, 1.019095]],  # 0.4
+        [[0.458064, 0.679578, -0.137642], [0.092785, 0.846313, 0.060902], [-0.007494, -0.016807, 1.024301]],  # 0.5
+        [[0.385450, 0.769005, -0.154455], [0.100526, 0.829802, 0.069673], [-0.007442, -0.022190, 1.029632]],  # 0.6
+        [[0.319627, 0.849633, -0.169261], [0.106241, 0.815969, 0.077790], [-0.007025, -0.028051, 1.035076]],  # 0.7
+        [[0.259411, 0.923008, -0.182420], [0.110296, 0.804340, 0.085364], [-0.006276, -0.034346, 1.040622]],  # 0.8
+        [[0.203876, 0.990338, -0.194214], [0.112975, 0.794542, 0.092483], [-0.005222, -0.041043, 1.046265]],  # 0.9
+        [[0.152286, 1.052583, -0.204868], [0.114503, 0.786281, 0.099216], [-0.003882, -0.048116, 1.051998]],  # 1.0
+    ],
+    'deutan': [
+        [[1.000000, 0.000000, 0.000000], [0.000000, 1.000000, 0.000000], [0.000000, 0.000000, 1.000000]],  # 0.0
+        [[0.866435, 0.177704, -0.044139], [0.049567, 0.939063, 0.011370], [-0.003453, 0.007233, 0.996220]],  # 0.1
+        [[0.760729, 0.319078, -0.079807], [0.090568, 0.889315, 0.020117], [-0.006027, 0.013325, 0.992702]],  # 0.2
+        [[0.675425, 0.433850, -0.109275], [0.125303, 0.847755, 0.026942], [-0.007950, 0.018572, 0.989378]],  # 0.3
+        [[0.605511, 0.528560, -0.134071], [0.155318, 0.812366, 0.032316], [-0.009376, 0.023176, 0.986200]],  # 0.4
+        [[0.547494, 0.607765, -0.155259], [0.181692, 0.781742, 0.036566], [-0.010410, 0.027275, 0.983136]],  # 0.5
+        [[0.498864, 0.674741, -0.173604], [0.205199, 0.754872, 0.039929], [-0.011131, 0.030969, 0.980162]],  # 0.6
+        [[0.457771, 0.731899, -0.189670], [0.226409, 0.731012, 0.042579], [-0.011595, 0.034333, 0.977261]],  # 0.7
+        [[0.422823, 0.781057, -0.203881], [0.245752, 0.709602, 0.044646], [-0.011843, 0.037423, 0.974421]],  # 0.8
+        [[0.392952, 0.823610, -0.216562], [0.263559, 0.690210, 0.046232], [-0.011910, 0.040281, 0.971630]],  # 0.9
+        [[0.367322, 0.860646, -0.227968], [0.280085, 0.672501, 0.047413], [-0.011820, 0.042940, 0.968881]],  # 1.0
+    ],
+    'tritan': [
+        [[1.000000, 0.000000, 0.000000], [0.000000, 1.000000, 0.000000], [0.000000, 0.000000, 1.000000]],  # 0.0
+        [[0.926670, 0.092514, -0.019184], [0.021191, 0.964503, 0.014306], [0.008437, 0.054813, 0.936750]],  # 0.1
+        [[0.895720, 0.133330, -0.029050], [0.029997, 0.945400, 0.024603], [0.013027, 0.104707, 0.882266]],  # 0.2
+        [[0.905871, 0.127791, -0.033662], [0.026856, 0.941251, 0.031893], [0.013410, 0.148296, 0.838294]],  # 0.3
+        [[0.948035, 0.089490, -0.037526], [0.014364, 0.946792, 0.038844], [0.010853, 0.193991, 0.795156]],  # 0.4
+        [[1.017277, 0.027029, -0.044306], [-0.006113, 0.958479, 0.047634], [0.006379, 0.248708, 0.744913]],  # 0.5
+        [[1.104996, -0.046633, -0.058363], [-0.032137, 0.971635, 0.060503], [0.001336, 0.317922, 0.680742]],  # 0.6
+        [[1.193214, -0.109812, -0.083402], [-0.058496, 0.979410, 0.079086], [-0.002346, 0.403492, 0.598854]],  # 0.7
+        [[1.257728, -0.139648, -0.118081], [-0.078003, 0.975409, 0.102594], [-0.003316, 0.501214, 0.502102]],  # 0.8
+        [[1.278864, -0.125333, -0.153531], [-0.084748, 0.957674, 0.127074], [-0.000989, 0.601151, 0.399838]],  # 0.9
+        [[1.255528, -0.076749, -0.178779], [-0.078411, 0.930809, 0.147602], [0.004733, 0.691367, 0.303900]],  # 1.0
+    ],
+}
+CVD_NAMES = {
+    'protan': 'Protan',
+    'deutan': 'Deutan',
+    'tritan': 'Tritan'
+}
+
+def cvd_matrices(severity=None):
+    """Retorna as matrizes protan/deutan/tritan (3, 3, 3), interpolando entre severidades tabeladas.
+
+    Sem ``severity``, usa ``CVD_SEVERITY``.
+    """
+    severity = float(np.clip(CVD_SEVERITY if severity is None else severity, 0.0, 1.0))
+    lower_idx = min(int(np.floor(severity * 10)), 9)
+    weight = severity * 10 - lower_idx
+    return np.stack([
+        (1 - weight) * np.asarray(table[lower_idx]) + weight * np.asarray(table[lower_idx + 1])
+        for table in CVD_MACHADO_MATRICES.values()
+    ])
+
+def simulate_cvd(rgba, severity=None):
+    """Simula as três deficiências sobre um array (..., 3 ou 4) com uma única multiplicação matricial.
+
+    Retorna um array (3, ...) na ordem de ``CVD_NAMES``, preservando o canal alfa.
+    """
+    rgba = np.asarray(rgba, dtype=float)
+    linear_rgb = srgb_to_linear(rgba[..., :3])
+    simulated_rgb = linear_to_srgb(np.einsum('dij,...j->d...i', cvd_matrices(severity), linear_rgb))
+    if rgba.shape[-1] == 3:
+        return simulated_rgb
+    alpha = np.broadcast_to(rgba[..., 3:], simulated_rgb.shape[:-1] + (1,))
+    return np.concatenate([simulated_rgb, alpha], axis=-1)
+
+def cvd_distinguishability_scores(colormaps, severity=None):
+    """Razão entre o comprimento perceptual (CAM02-UCS) simulado e o original de cada colormap."""
+    _require_pandas()
+    names = list(colormaps)
+    original_rgb = np.stack([get_colormap_lut(name, colormaps[name])['rgba'][:, :3] for name in names])
+    simulated_rgb = simulate_cvd(original_rgb, severity)  # (deficiências, colormaps, amostras, 3)
+
+    all_rgb = np.concatenate([original_rgb[None], simulated_rgb])
+    ucs = xyz_to_cam02ucs(srgb_to_xyz(all_rgb))
+    perceptual_length = np.linalg.norm(np.diff(ucs, axis=2), axis=-1).sum(axis=2)
+    scores = perceptual_length[1:] / perceptual_length[0]
+
+    scores_df = pd.DataFrame(
+        scores.T, columns=list(CVD_NAMES.values()),
+        index=[COLORMAP_NAMES.get(name, name.capitalize()) for name in names]
     )
-    
+    scores_df.index.name = 'Colormap'
+    scores_df['Mínimo'] = scores_df.min(axis=1)
+    return scores_df
+
+def plot_cvd_colormap_comparison(colormaps, severity=None,
+                                 output_filename="cvd_colormap_comparison.png",
+                                 scores_filename="cvd_distinguishability_scores.csv"):
+    """Compara cada colormap com suas versões simuladas para protan, deutan e tritan."""
+    severity = CVD_SEVERITY if severity is None else severity
+    print(f"Criando comparação de simulação de daltonismo (severidade {severity:.1f})...")
+    scores_df = cvd_distinguishability_scores(colormaps, severity)
+    scores_df.to_csv(os.path.join(OUTPUT_DIR, scores_filename), float_format='%.4f')
+
+    names = list(colormaps)
+    original_rgb = np.stack([get_colormap_lut(name, colormaps[name])['rgba'][:, :3] for name in names])
+    simulated_rgb = simulate_cvd(original_rgb, severity)
+    panel_titles = ['Original'] + list(CVD_NAMES.values())
+
+    num_colormaps = len(names)
+    fig, axes = plt.subplots(num_colormaps, len(panel_titles), figsize=(16, 1.8 * num_colormaps),
+                             squeeze=False, constrained_layout=True)
+    for i, name in enumerate(names):
+        display_name = COLORMAP_NAMES.get(name, name.capitalize())
+        panels = [original_rgb[i]] + [simulated_rgb[d, i] for d in range(len(CVD_NAMES))]
+        for j, (panel_title, panel_rgb) in enumerate(zip(panel_titles, panels)):
+            ax = axes[i, j]
+            ax.imshow(np.repeat(panel_rgb[None], 2, axis=0), aspect='auto')
+            if j == 0:
+                ax.set_title(f"{display_name} - {panel_title}", fontsize=TITLE_FONTSIZE-2)
+            else:
+                score = scores_df.loc[display_name, panel_title]
+                ax.set_title(f"{panel_title} (distinguibilidade {score:.2f})", fontsize=TITLE_FONTSIZE-2)
+            ax.set_yticks([])
+            ax.set_xticks([])
+
+    save_figure(output_filename)
+    plt.close(fig)
+    print(f"Comparação de daltonismo salva em: {os.path.join(OUTPUT_DIR, output_filename)}")
+    return scores_df
+
+def simulate_cvd_image(rgb_uint8, severity=None, linear_levels=16384):
+    """Versão de ``simulate_cvd`` para buffers de imagem uint8, usando tabelas de gama.
+
+    A linearização vem de uma tabela de 256 entradas e a volta ao sRGB de uma
+    tabela de ``linear_levels`` níveis, evitando potências por pixel.
+    Retorna um array uint8 (3, H, W, 3).
+    """
+    to_linear = srgb_to_linear(np.arange(256) / 255).astype(np.float32)
+    to_srgb = np.round(linear_to_srgb(np.linspace(0, 1, linear_levels)) * 255).astype(np.uint8)
+
+    image_shape = rgb_uint8.shape[:-1]
+    linear_rgb = to_linear[rgb_uint8[..., :3].reshape(-1, 3)]
+    simulated = linear_rgb @ cvd_matrices(severity).astype(np.float32).transpose(0, 2, 1)
+    simulated *= linear_levels - 1
+    np.clip(simulated, 0, linear_levels - 1, out=simulated)
+    return to_srgb[np.rint(simulated).astype(np.uint16)].reshape((len(CVD_NAMES),) + image_shape + (3,))
+
+def cvd_preview_filename(output_filename):
+    """Arquivo da prévia de daltonismo de uma figura."""
+    return f"{os.path.splitext(output_filename)[0]}_cvd.png"
+
+def save_cvd_preview(rgba, output_filename, severity=None, downsample=None):
+    """Grava a prévia de daltonismo de uma figura a partir do seu buffer RGBA já renderizado.
+
+    O buffer é reduzido e as três deficiências são obtidas por uma única
+    multiplicação matricial; o resultado é uma grade 2 × 2
+    (original, protan / deutan, tritan), sem ler nem renderizar a figura de novo.
+    """
+    _require_pillow()
+    downsample = downsample or CVD_FIGURE_DOWNSAMPLE
+    # Reduz antes de descartar o alfa, para não copiar o buffer em resolução cheia
+    figure_image = Image.fromarray(rgba)
+    if downsample > 1:
+        figure_image = figure_image.reduce(downsample)
+    figure_rgb = np.asarray(figure_image.convert('RGB'))
+    simulated_rgb = simulate_cvd_image(figure_rgb, severity)
+
+    top_row = np.concatenate([figure_rgb, simulated_rgb[0]], axis=1)
+    bottom_row = np.concatenate([simulated_rgb[1], simulated_rgb[2]], axis=1)
+    preview_path = os.path.join(OUTPUT_DIR, cvd_preview_filename(output_filename))
+    # Prévia: compressão mais leve que o padrão, pois o custo dominante é o zlib
+    Image.fromarray(np.concatenate([top_row, bottom_row], axis=0)).save(preview_path, compress_level=3)
+    print(f"Simulação de daltonismo salva em: {preview_path}")
+
+# --- Build Incremental ---
+def _update_build_digest(digest, value):
+    """Alimenta o hash com o conteúdo de uma entrada de figura (dados, LUTs, parâmetros)."""
+    if pd is not None and isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.columns), [str(dtype) for dtype in value.dtypes])).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif pd is not None and isinstance(value, pd.Series):
+        digest.update(repr((value.name, str(value.dtype))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, Colormap):
+        digest.update(np.ascontiguousarray(value(np.linspace(0, 1, value.N))).tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        # Na ordem de inserção: a ordem dos colormaps define a ordem dos painéis
+        digest.update(f"dict[{len(value)}]".encode())
+        for key, item in value.items():
+            digest.update(repr(key).encode())
+            _update_build_digest(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}[{len(value)}]".encode())
+        for item in value:
+            _update_build_digest(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+def _script_sha256():
+    """Hash do próprio script: mudanças de código invalidam todas as figuras."""
+    return _file_sha256(os.path.abspath(__file__))
+
+def figure_build_hash(plot_func, plot_kwargs):
+    """Hash de todas as entradas de uma figura: função, argumentos e configurações de renderização."""
+    digest = hashlib.sha256()
+    _update_build_digest(digest, {
+        'script': _script_sha256(),
+        'function': plot_func.__qualname__,
+        'kwargs': plot_kwargs,
+        'settings': (DEFAULT_DPI, TITLE_FONTSIZE, LABEL_FONTSIZE, ANNOT_FONTSIZE, RENDER_MODE,
+                     SCATTER_DENSITY_THRESHOLD, SCATTER_DENSITY_BINS, SCATTER_DENSITY_STATISTIC,
+                     HEATMAP_ANNOT_MAX_CELLS, HEATMAP_MAX_DISPLAY_CELLS, HEATMAP_MAX_TICKS, HEATMAP_CLUSTER_REORDER,
+                     CVD_SEVERITY, CVD_FIGURE_DOWNSAMPLE,
+                     EXPORT_FORMATS, EXPORT_DPI_VARIANTS, EXPORT_TILES, EXPORT_TILE_SIZE,
+                     COLORMAP_NAMES, matplotlib.__version__, _package_version('seaborn')),
+    })
+    return digest.hexdigest()
+
+def _job_output_filename(plot_func, plot_kwargs):
+    """Arquivo gerado por um trabalho (argumento explícito ou valor padrão da função)."""
+    if 'output_filename' in plot_kwargs:
+        return plot_kwargs['output_filename']
+    import inspect
+    return inspect.signature(plot_func).parameters['output_filename'].default
+
+def _read_build_manifest():
+    """Lê o manifesto da última execução (vazio se ausente ou corrompido)."""
+    try:
+        with open(os.path.join(OUTPUT_DIR, BUILD_MANIFEST_FILE), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+def plan_incremental_build(render_jobs):
+    """Separa os trabalhos cujas entradas ou saídas mudaram desde o último manifesto.
+
+    Retorna os trabalhos a executar e o hash de entrada de cada figura planejada.
+    """
+    build_hashes = {
+        _job_output_filename(plot_func, plot_kwargs): figure_build_hash(plot_func, plot_kwargs)
+        for plot_func, plot_kwargs in render_jobs
+    }
+    if not INCREMENTAL_BUILD:
+        return list(render_jobs), build_hashes
+
+    manifest = _read_build_manifest()
+    stale_jobs = []
+    for plot_func, plot_kwargs in render_jobs:
+        output_filename = _job_output_filename(plot_func, plot_kwargs)
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        entry = manifest.get(output_filename, {})
+        derived_paths = export_output_paths(output_filename)
+        if plot_kwargs.get('cvd_preview'):
+            derived_paths.append(os.path.join(OUTPUT_DIR, cvd_preview_filename(output_filename)))
+        if (entry.get('input_hash') == build_hashes[output_filename]
+                and os.path.exists(output_path)
+                and entry.get('output_sha256') == _file_sha256(output_path)
+                and all(os.path.exists(path) for path in derived_paths)):
+            print(f"Atualizado, pulando: {output_path}")
+            continue
+        stale_jobs.append((plot_func, plot_kwargs))
+    return stale_jobs, build_hashes
+
+def update_build_manifest(build_hashes):
+    """Registra no manifesto o hash das entradas e do conteúdo de cada figura gerada."""
+    manifest = _read_build_manifest()
+    for output_filename, input_hash in build_hashes.items():
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        if os.path.exists(output_path):
+            manifest[output_filename] = {
+                'input_hash': input_hash,
+                'output_sha256': _file_sha256(output_path),
+            }
+    manifest_path = os.path.join(OUTPUT_DIR, BUILD_MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+# --- Renderização Paralela ---
+def _render_worker_settings():
+    """Configurações alteradas em tempo de execução (linha de comando, benchmark) que os processos filhos usam.
+
+    Processos iniciados por spawn/forkserver reimportam o script e veriam só os valores padrão.
+    """
+    return dict(OUTPUT_DIR=OUTPUT_DIR, EXPORT_FORMATS=EXPORT_FORMATS, EXPORT_TILES=EXPORT_TILES)
+
+def _init_render_worker(settings):
+    """Inicializador do pool: aplica as configurações do processo principal."""
+    globals().update(settings)
+
+def _run_profiled_job(plot_func, plot_kwargs, collect=True):
+    """Executa um trabalho de renderização sob perfil; em processos filhos, devolve os registros."""
+    _require_matplotlib()  # Processos filhos iniciados por spawn/forkserver não herdam as importações
+    profile_start = len(STAGE_PROFILE)
+    output_filename = _job_output_filename(plot_func, plot_kwargs)
+    with profile_stage(f"figure:{output_filename}"):
+        plot_func(**plot_kwargs)
+    if not collect:
+        return []
+    job_records = STAGE_PROFILE[profile_start:]
+    del STAGE_PROFILE[profile_start:]
+    return job_records
+
+def run_render_jobs(render_jobs, max_workers=None):
+    """Executa trabalhos de renderização (função, kwargs) em um pool de processos."""
+    if not render_jobs:
+        return
+    if max_workers is None:
+        max_workers = RENDER_WORKERS if RENDER_WORKERS is not None else (os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(render_jobs)))
+
+    if max_workers == 1:
+        for plot_func, plot_kwargs in render_jobs:
+            _run_profiled_job(plot_func, plot_kwargs, collect=False)
+        return
+
+    print(f"Renderizando {len(render_jobs)} figuras em {max_workers} processos...")
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker,
+                             initargs=(_render_worker_settings(),)) as executor:
+        futures = [executor.submit(_run_profiled_job, plot_func, plot_kwargs) for plot_func, plot_kwargs in render_jobs]
+        # Propagar exceções dos processos filhos e reunir seus registros de perfil
+        for future in futures:
+            STAGE_PROFILE.extend(future.result())
+
+# --- Trabalhos de Renderização ---
+def bar_chart_job(countries_df, colormaps, year, value_col='Human Development Index',
+                  title='Índice de Desenvolvimento Humano', output_filename="hdi_barplots_comparison.png",
+                  cvd_preview=False):
+    """Trabalho (função, kwargs) das barras de um indicador em um ano; None se não houver dados."""
+    if countries_df.empty:
+        print(f"Pulando gráficos de barras: sem dados para {year}")
+        return None
+    min_val = countries_df[value_col].min()
+    max_val = countries_df[value_col].max()
+    xlim_bars = (min_val * 0.98, max_val * 1.02)
+
+    return (plot_bar_chart_comparison, dict(
+        data_df=countries_df, 
+        value_col=value_col, 
+        label_col='Entity',
+        title_prefix=f'{title} ({year})', 
+        colormaps=colormaps,
+        output_filename=output_filename, 
+        xlim_range=xlim_bars,
+        cvd_preview=cvd_preview
+    ))
+
+def join_indicators(x_countries_df, x_col, y_df, y_col, x_label=None, y_label=None):
+    """Junta dois indicadores por (Entity, Code), renomeando as colunas de valor para os rótulos dos eixos.
+
+    Retorna (DataFrame mesclado, coluna x, coluna y).
+    """
+    x_label = x_label or x_col
+    y_label = y_label or y_col
+    if x_label == y_label:
+        raise ValueError(f"Rótulos de eixo repetidos na junção: '{x_label}'")
+    merged_df = pd.merge(
+        x_countries_df[['Entity', 'Code', x_col]].rename(columns={x_col: x_label}),
+        y_df[['Entity', 'Code', y_col]].rename(columns={y_col: y_label}),
+        on=['Entity', 'Code'],
+        how='inner'
+    )
+    return merged_df, x_label, y_label
+
+def scatter_job(merged_df, colormaps, x_col, y_col, color_col, title,
+                output_filename="hdi_life_expectancy_scatter_comparison.png", cvd_preview=False):
+    """Trabalho (função, kwargs) da dispersão entre dois indicadores já mesclados; None se não houver dados."""
+    if merged_df.empty:
+        print("Pulando gráficos de dispersão: dados mesclados insuficientes")
+        return None
+    return (plot_scatter_comparison, dict(
+        data_df=merged_df, 
+        x_col=x_col, 
+        y_col=y_col,
+        color_val_col=color_col,
+        title_prefix=title,
+        colormaps=colormaps, 
+        output_filename=output_filename,
+        cvd_preview=cvd_preview
+    ))
+
+def heatmap_job(correlation_matrix_df, colormaps, title,
+                output_filename="happiness_year_to_year_correlation_heatmap.png", reorder=None, cvd_preview=False):
+    """Trabalho (função, kwargs) do heatmap de uma matriz de correlação ano a ano; None se não houver dados."""
     year_correlation_vmax = 1.0
+
+    if correlation_matrix_df.empty:
+        print("Não foi possível gerar o heatmap de correlação (dados insuficientes)")
+        return None
+    if len(correlation_matrix_df) > 1:
+        min_corr = np.nanmin(correlation_matrix_df.values[
+            np.triu_indices_from(correlation_matrix_df.values, k=1)
+        ])
+    else:
+        min_corr = 0.8
     
-    if not happiness_corr_years_df.empty:
-        if len(happiness_corr_years_df) > 1:
-            happiness_min_corr = happiness_corr_years_df.values[
-                np.triu_indices_from(happiness_corr_years_df.values, k=1)
-            ].min()
+    year_corr_vmin = max(0, min_corr - 0.05)
+
+    heatmap_kwargs = dict(
+        correlation_matrix_df=correlation_matrix_df,
+        title_prefix=title,
+        colormaps=colormaps, 
+        output_filename=output_filename,
+        vmin_val=year_corr_vmin,
+        vmax_val=year_correlation_vmax,
+        cvd_preview=cvd_preview
+    )
+    if reorder is not None:
+        heatmap_kwargs['reorder'] = reorder
+    return plot_heatmap_comparison, heatmap_kwargs
+
+# --- Pipeline Declarativo ---
+def default_pipeline_config():
+    """Configuração equivalente ao pipeline padrão (mesmas figuras, anos e arquivos de saída)."""
+    return {'plots': [
+        {'type': 'gradient'},
+        {'type': 'bars', 'indicator': 'hdi', 'year': TARGET_YEAR_HDI,
+         'output': "hdi_barplots_comparison.png"},
+        {'type': 'scatter', 'x': 'hdi', 'y': 'life_expectancy',
+         'year': TARGET_YEAR_HDI, 'y_year': TARGET_YEAR_LIFE_EXPECTANCY,
+         'output': "hdi_life_expectancy_scatter_comparison.png"},
+        {'type': 'grayscale'},
+        {'type': 'heatmap', 'indicator': 'happiness', 'restrict_to': ['hdi'],
+         'years': [min(YEARS_FOR_CORRELATION), max(YEARS_FOR_CORRELATION)],
+         'output': "happiness_year_to_year_correlation_heatmap.png"},
+        {'type': 'perceptual'},
+        {'type': 'cvd'},
+    ]}
+
+def load_pipeline_config(config_path):
+    """Lê uma configuração declarativa em TOML ou YAML (este requer PyYAML).
+
+    ``datasets.<nome>`` registra indicadores (argumentos de ``register_dataset``),
+    ``colormaps`` restringe os colormaps comparados e ``plots`` lista os gráficos;
+    sem ``plots``, valem os do pipeline padrão.
+    """
+    if config_path.endswith(('.yaml', '.yml')):
+        import yaml
+        with open(config_path, encoding='utf-8') as config_file:
+            config = yaml.safe_load(config_file) or {}
+    else:
+        import tomllib
+        with open(config_path, 'rb') as config_file:
+            config = tomllib.load(config_file)
+
+    for name, dataset_spec in config.get('datasets', {}).items():
+        try:
+            register_dataset(name, **dataset_spec)
+        except TypeError as e:
+            raise ValueError(f"datasets.{name}: {e}") from e
+    config['plots'] = config.get('plots') or default_pipeline_config()['plots']
+    validate_pipeline_config(config)
+    return config
+
+PLOT_REQUIRED_FIELDS = {'bars': ('indicator',), 'scatter': ('x', 'y'), 'heatmap': ('indicator',)}
+
+def validate_pipeline_config(config):
+    """Confere tipo, campos obrigatórios, datasets e arquivo de saída de cada gráfico.
+
+    Levanta ValueError indicando o primeiro item de ``plots`` inválido.
+    """
+    output_owners = {}
+    for index, plot_spec in enumerate(config['plots']):
+        where = f"plots[{index}] {plot_spec!r}"
+        if not isinstance(plot_spec, dict) or plot_spec.get('type') not in FIGURE_TYPES:
+            raise ValueError(f"{where}: tipo de figura desconhecido")
+        missing = [field for field in PLOT_REQUIRED_FIELDS.get(plot_spec['type'], ()) if field not in plot_spec]
+        if missing:
+            raise ValueError(f"{where}: campo(s) obrigatório(s) ausente(s): {', '.join(missing)}")
+        window = plot_spec.get('years', (None, None))
+        if not (isinstance(window, (list, tuple)) and len(window) == 2):
+            raise ValueError(f"{where}: 'years' deve ser [ano inicial, ano final]")
+        for name in plot_dataset_years([plot_spec]):
+            if name not in DATASET_REGISTRY:
+                raise ValueError(f"{where}: dataset não registrado '{name}'")
+        # Gráficos sem dados têm um único arquivo por tipo
+        output = plot_output_filename(plot_spec) or plot_spec['type']
+        if output in output_owners:
+            raise ValueError(f"{where}: saída '{output}' repetida (já usada por plots[{output_owners[output]}])")
+        output_owners[output] = index
+
+def plot_output_filename(plot_spec):
+    """Arquivo de um gráfico de dados: ``output`` ou um nome com indicadores e anos (None para os demais tipos)."""
+    plot_type = plot_spec['type']
+    if plot_type not in PLOT_REQUIRED_FIELDS:
+        return None
+    if 'output' in plot_spec:
+        return plot_spec['output']
+    if plot_type == 'bars':
+        return f"{plot_spec['indicator']}_barplots_comparison_{plot_spec.get('year', TARGET_YEAR_HDI)}.png"
+    if plot_type == 'scatter':
+        x_year = plot_spec.get('year', TARGET_YEAR_HDI)
+        return (f"{plot_spec['x']}_{plot_spec['y']}_scatter_comparison_"
+                f"{x_year}-{plot_spec.get('y_year', x_year)}.png")
+    years = _heatmap_years(plot_spec)
+    return f"{plot_spec['indicator']}_year_to_year_correlation_heatmap_{min(years)}-{max(years)}.png"
+
+def load_config_colormaps(config):
+    """Colormaps comparados: os listados em ``colormaps`` na configuração, ou todos os padrão."""
+    if config.get('colormaps'):
+        colormaps = {name: load_colormap(name) for name in config['colormaps']}
+    else:
+        colormaps = load_colormaps()
+    warm_colormap_luts(colormaps)
+    return colormaps
+
+def _heatmap_indicators(plot_spec):
+    """Indicadores correlacionados juntos: os de ``restrict_to`` e o do heatmap, nesta ordem."""
+    return list(dict.fromkeys([*plot_spec.get('restrict_to', []), plot_spec['indicator']]))
+
+def _heatmap_years(plot_spec):
+    """Janela de anos (inclusiva) de um heatmap."""
+    if 'years' not in plot_spec:
+        return YEARS_FOR_CORRELATION
+    first_year, last_year = plot_spec['years']
+    return range(first_year, last_year + 1)
+
+def plot_dataset_years(plot_specs):
+    """União dos anos que os gráficos pedem de cada dataset: {nome: [anos]}."""
+    dataset_years = {}
+    for plot_spec in plot_specs:
+        plot_type = plot_spec['type']
+        if plot_type == 'bars':
+            requested = [(plot_spec['indicator'], [plot_spec.get('year', TARGET_YEAR_HDI)])]
+        elif plot_type == 'scatter':
+            x_year = plot_spec.get('year', TARGET_YEAR_HDI)
+            requested = [(plot_spec['x'], [x_year]), (plot_spec['y'], [plot_spec.get('y_year', x_year)])]
+        elif plot_type == 'heatmap':
+            requested = [(name, _heatmap_years(plot_spec)) for name in _heatmap_indicators(plot_spec)]
         else:
-            happiness_min_corr = 0.8
-        
-        happiness_year_corr_vmin = max(0, happiness_min_corr - 0.05)
-
-        plot_heatmap_comparison(
-            correlation_matrix_df=happiness_corr_years_df,
-            title_prefix=f'Correlação Felicidade Ano a Ano ({min(YEARS_FOR_CORRELATION)}-{max(YEARS_FOR_CORRELATION)})',
-            colormaps=colormaps_dict, 
-            output_filename="happiness_year_to_year_correlation_heatmap.png",
-            vmin_val=happiness_year_corr_vmin,
-            vmax_val=year_correlation_vmax
+            requested = []
+        for name, years in requested:
+            dataset_years.setdefault(name, set()).update(years)
+    return {name: sorted(years) for name, years in dataset_years.items()}
+
+class PipelineData:
+    """Datasets indexados e resultados intermediários compartilhados entre os gráficos.
+
+    Recortes por ano, junções e matrizes de correlação são calculados na primeira
+    vez em que um gráfico os pede e reaproveitados pelos demais.
+    """
+
+    def __init__(self, datasets):
+        self.datasets = {name: _as_year_indexed(data) for name, data in datasets.items()}
+        self._countries = {}
+        self._joins = {}
+        self._correlations = {}
+
+    def dataset(self, name):
+        """Dataset indexado de um indicador carregado."""
+        if name not in self.datasets:
+            raise ValueError(f"Dataset não carregado: '{name}'")
+        return self.datasets[name]
+
+    def countries(self, name, year):
+        """Países com valor do indicador no ano."""
+        if (name, year) not in self._countries:
+            dataset_spec = DATASET_REGISTRY[name]
+            self._countries[name, year] = prepare_indicator_data(
+                self.dataset(name), dataset_spec['value_col'], year, dataset_spec['short_title']
+            )
+        return self._countries[name, year]
+
+    def joined(self, x_name, x_year, y_name, y_year):
+        """Junção (Entity, Code) de dois indicadores; retorna (DataFrame, coluna x, coluna y)."""
+        join_key = (x_name, x_year, y_name, y_year)
+        if join_key not in self._joins:
+            x_label, y_label = dataset_axis_label(x_name), dataset_axis_label(y_name)
+            if x_label == y_label:
+                x_label, y_label = f"{x_label} ({x_year})", f"{y_label} ({y_year})"
+            self._joins[join_key] = join_indicators(
+                self.countries(x_name, x_year), DATASET_REGISTRY[x_name]['value_col'],
+                self.dataset(y_name).year_view(y_year), DATASET_REGISTRY[y_name]['value_col'],
+                x_label, y_label
+            )
+        return self._joins[join_key]
+
+    def correlations(self, names, years):
+        """Matrizes de correlação ano a ano dos indicadores, restritas aos países com dados de todos."""
+        correlation_key = (frozenset(names), tuple(years))
+        if correlation_key not in self._correlations:
+            with profile_stage('year_to_year_correlation'):
+                self._correlations[correlation_key] = prepare_indicator_correlation_data(
+                    {name: (self.dataset(name), DATASET_REGISTRY[name]['value_col']) for name in names}, years
+                )
+        return self._correlations[correlation_key]
+
+def build_plot_job(plot_spec, pipeline_data, colormaps, cvd_preview=False):
+    """Trabalho (função, kwargs) de um gráfico da configuração; None se não houver dados.
+
+    Com ``cvd_preview``, os gráficos de dados também gravam sua prévia de daltonismo.
+    """
+    plot_type = plot_spec['type']
+    if plot_type == 'gradient':
+        return plot_gradients_comparison, dict(colormaps=colormaps)
+    if plot_type == 'grayscale':
+        return plot_grayscale_comparison, dict(colormaps=colormaps)
+    if plot_type == 'cvd':
+        return plot_cvd_colormap_comparison, dict(colormaps=colormaps)
+    if plot_type == 'bars':
+        name = plot_spec['indicator']
+        year = plot_spec.get('year', TARGET_YEAR_HDI)
+        return bar_chart_job(
+            pipeline_data.countries(name, year), colormaps, year,
+            value_col=DATASET_REGISTRY[name]['value_col'],
+            title=plot_spec.get('title', DATASET_REGISTRY[name]['title']),
+            output_filename=plot_output_filename(plot_spec),
+            cvd_preview=cvd_preview
+        )
+    if plot_type == 'scatter':
+        x_name, y_name = plot_spec['x'], plot_spec['y']
+        x_year = plot_spec.get('year', TARGET_YEAR_HDI)
+        y_year = plot_spec.get('y_year', x_year)
+        merged_df, x_col, y_col = pipeline_data.joined(x_name, x_year, y_name, y_year)
+        color_col = y_col if plot_spec.get('color', x_name) == y_name != x_name else x_col
+        title = plot_spec.get(
+            'title', f"{DATASET_REGISTRY[x_name]['short_title']} vs. {DATASET_REGISTRY[y_name]['short_title']}"
+        )
+        return scatter_job(
+            merged_df, colormaps, x_col, y_col, color_col, f"{title} ({x_year}/{y_year})",
+            output_filename=plot_output_filename(plot_spec),
+            cvd_preview=cvd_preview
         )
+    if plot_type == 'heatmap':
+        name = plot_spec['indicator']
+        years = _heatmap_years(plot_spec)
+        correlations = pipeline_data.correlations(_heatmap_indicators(plot_spec), years)
+        title = plot_spec.get('title', f"Correlação {DATASET_REGISTRY[name]['short_title']} Ano a Ano")
+        return heatmap_job(
+            correlations[name], colormaps, f"{title} ({min(years)}-{max(years)})",
+            output_filename=plot_output_filename(plot_spec),
+            reorder=plot_spec.get('reorder'),
+            cvd_preview=cvd_preview
+        )
+    raise ValueError(f"Tipo de figura sem trabalho de renderização: '{plot_type}'")
+
+# --- Séries Temporais (Animações e Small Multiples) ---
+TIME_SERIES_PLOT_TYPES = ('bars', 'scatter')  # Gráficos da configuração animados por 'timeseries'
+_TIME_SERIES_SCAFFOLDS = {}  # Esqueletos de figura por processo, reaproveitados entre tarefas
+
+def time_series_spec(plot_spec, colormaps, top_n=20):
+    """Série temporal de um gráfico de barras ou dispersão da configuração.
+
+    Indicadores, colunas e rótulos vêm do registro; a dispersão usa o mesmo ano nos dois eixos.
+    """
+    if plot_spec['type'] == 'bars':
+        name = plot_spec['indicator']
+        return dict(
+            kind='bars', name=f"{name}_barplots", colormaps=colormaps, top_n=top_n,
+            title_prefix=plot_spec.get('title', DATASET_REGISTRY[name]['title']),
+            indicator=name, value_col=DATASET_REGISTRY[name]['value_col'], x_label=dataset_axis_label(name),
+        )
+    x_name, y_name = plot_spec['x'], plot_spec['y']
+    color_name = y_name if plot_spec.get('color', x_name) == y_name else x_name
+    return dict(
+        kind='scatter', name=f"{x_name}_{y_name}_scatter", colormaps=colormaps, top_n=top_n,
+        title_prefix=plot_spec.get(
+            'title', f"{DATASET_REGISTRY[x_name]['short_title']} vs. {DATASET_REGISTRY[y_name]['short_title']}"
+        ),
+        x=x_name, y=y_name, color=color_name, x_label=dataset_axis_label(x_name),
+        y_label=dataset_axis_label(y_name), color_label=dataset_axis_label(color_name),
+    )
+
+def prepare_time_series_data(spec, pipeline_data, years):
+    """Fatias por ano de uma série (top N das barras ou pares da dispersão) e limites comuns a todos os anos."""
+    frames_by_year = {}
+    for year in years:
+        if spec['kind'] == 'bars':
+            countries_df = pipeline_data.countries(spec['indicator'], year)
+            if countries_df.empty:
+                continue
+            top_df = countries_df.sort_values(spec['value_col'], ascending=False).head(spec['top_n'])
+            frames_by_year[year] = (top_df['Entity'].astype(str).tolist(), top_df[spec['value_col']].to_numpy())
+        else:
+            merged_df, x_col, y_col = pipeline_data.joined(spec['x'], year, spec['y'], year)
+            merged_df = merged_df.dropna(subset=[x_col, y_col])
+            if not merged_df.empty:
+                color_col = y_col if spec['color'] == spec['y'] != spec['x'] else x_col
+                frames_by_year[year] = (merged_df[x_col].to_numpy(), merged_df[y_col].to_numpy(),
+                                        merged_df[color_col].to_numpy())
+
+    def padded_range(values, padding):
+        low, high = float(np.min(values)), float(np.max(values))
+        margin = (high - low) * padding
+        return low - margin, high + margin
+
+    if not frames_by_year:
+        return frames_by_year, None
+    if spec['kind'] == 'bars':
+        all_values = np.concatenate([values for _, values in frames_by_year.values()])
+        return frames_by_year, {
+            'xlim': (all_values.min() * 0.98, all_values.max() * 1.02),
+            # O layout é calculado uma vez com os rótulos mais longos de todos os anos
+            'widest_label': max((label for labels, _ in frames_by_year.values() for label in labels), key=len),
+        }
+    all_x, all_y, all_color = (np.concatenate(values) for values in zip(*frames_by_year.values()))
+    return frames_by_year, {
+        'xlim': padded_range(all_x, 0.05),
+        'ylim': padded_range(all_y, 0.05),
+        'clim': (float(all_color.min()), float(all_color.max())),
+    }
+
+def _panel_grid(kind, num_colormaps):
+    """Linhas e colunas de painéis de cada tipo de figura (as mesmas das figuras estáticas)."""
+    if kind == 'bars':
+        return num_colormaps, 1
+    return (num_colormaps + 1) // 2, 2 if num_colormaps > 1 else 1
+
+def _build_time_series_scaffold(spec):
+    """Cria a figura uma única vez: eixos, limites, barras de cores e artistas vazios a atualizar."""
+    _require_matplotlib()
+    colormaps, limits, top_n = spec['colormaps'], spec['limits'], spec['top_n']
+    rows, cols = _panel_grid(spec['kind'], len(colormaps))
+    panel_size = (14, 5) if spec['kind'] == 'bars' else (8, 6.5)
+    fig, axes = plt.subplots(rows, cols, figsize=(panel_size[0] * cols, panel_size[1] * rows),
+                             dpi=ANIMATION_DPI, squeeze=False, constrained_layout=True)
+    axes_flat = axes.flatten()
+
+    panels = []
+    for i, (name, cmap_obj) in enumerate(colormaps.items()):
+        ax = axes_flat[i]
+        title = ax.set_title('', fontsize=TITLE_FONTSIZE)
+        if spec['kind'] == 'bars':
+            positions = np.arange(top_n)
+            artist = ax.barh(positions, np.zeros(top_n),
+                             color=sample_colormap(name, cmap_obj, np.linspace(0, 1, top_n)),
+                             edgecolor='grey', linewidth=0.5)
+            ax.set_yticks(positions, [limits['widest_label']] * top_n)
+            ax.set_ylim(top_n - 0.5, -0.5)  # Maior valor no topo, como invert_yaxis
+            ax.set_xlim(limits['xlim'])
+            ax.set_xlabel(spec['x_label'], fontsize=LABEL_FONTSIZE)
+            ax.tick_params(axis='y', labelsize=LABEL_FONTSIZE-1)
+            ax.tick_params(axis='x', labelsize=LABEL_FONTSIZE)
+            ax.grid(axis='x', linestyle=':', alpha=0.6)
+        else:
+            artist = ax.scatter(
+                np.zeros(0), np.zeros(0), c=np.zeros(0), cmap=cmap_obj,
+                norm=matplotlib.colors.Normalize(*limits['clim']),
+                s=60, alpha=0.8, edgecolor='k', linewidth=0.3
+            )
+            ax.set_xlim(limits['xlim'])
+            ax.set_ylim(limits['ylim'])
+            ax.set_xlabel(spec['x_label'], fontsize=LABEL_FONTSIZE)
+            ax.set_ylabel(spec['y_label'], fontsize=LABEL_FONTSIZE)
+            ax.tick_params(axis='both', labelsize=LABEL_FONTSIZE-1)
+            ax.grid(linestyle=':', alpha=0.6)
+            cbar = fig.colorbar(artist, ax=ax)
+            cbar.ax.tick_params(labelsize=LABEL_FONTSIZE-1)
+            cbar.set_label(spec['color_label'], size=LABEL_FONTSIZE)
+        title.set_text(f"{spec['title_prefix']} (0000) - {COLORMAP_NAMES.get(name, name.capitalize())}")
+        panels.append((name, ax, artist, title))
+
+    for j in range(len(panels), len(axes_flat)):
+        fig.delaxes(axes_flat[j])
+
+    # Layout calculado uma única vez e congelado: quadros com o mesmo enquadramento
+    fig.canvas.draw()
+    fig.set_layout_engine('none')
+    return fig, panels
+
+def _update_time_series_frame(spec, panels, year, frame_data):
+    """Atualiza apenas os dados e títulos do esqueleto para um ano."""
+    for name, ax, artist, title in panels:
+        if spec['kind'] == 'bars':
+            labels, values = frame_data
+            for i, bar in enumerate(artist):
+                bar.set_width(values[i] if i < len(values) else 0.0)
+            ax.set_yticklabels(list(labels) + [''] * (spec['top_n'] - len(labels)))
+        else:
+            x_values, y_values, color_values = frame_data
+            artist.set_offsets(np.column_stack([x_values, y_values]))
+            artist.set_array(color_values)
+        title.set_text(f"{spec['title_prefix']} ({year}) - {COLORMAP_NAMES.get(name, name.capitalize())}")
+
+def _render_time_series_chunk(spec, year_frames):
+    """Renderiza um bloco de anos sobre o esqueleto do processo; devolve quadros RGB em memória."""
+    scaffold_key = (spec['name'], repr(spec['limits']), tuple(spec['colormaps']))
+    if scaffold_key not in _TIME_SERIES_SCAFFOLDS:
+        _TIME_SERIES_SCAFFOLDS[scaffold_key] = _build_time_series_scaffold(spec)
+    fig, panels = _TIME_SERIES_SCAFFOLDS[scaffold_key]
+
+    rendered = []
+    for year, frame_data in year_frames:
+        _update_time_series_frame(spec, panels, year, frame_data)
+        fig.canvas.draw()
+        rendered.append((year, np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()))
+    return rendered
+
+def _open_gif_encoder(output_path, fps):
+    """Encoder GIF: cada quadro é quantizado ao chegar; o arquivo é gravado ao fechar."""
+    _require_pillow()
+    palette_frames = []
+
+    def write(frame):
+        palette_frames.append(Image.fromarray(frame).quantize(colors=256, method=Image.Quantize.FASTOCTREE))
+
+    def close():
+        if palette_frames:
+            palette_frames[0].save(output_path, save_all=True, append_images=palette_frames[1:],
+                                   duration=int(1000 / fps), loop=0)
+            print(f"Animação salva em: {output_path}")
+    return write, close
+
+def _open_ffmpeg_encoder(output_path, fps):
+    """Encoder MP4: quadros RGB enviados direto à entrada padrão do ffmpeg, sem PNGs intermediários."""
+    import subprocess
+    ffmpeg_path = shutil.which('ffmpeg')
+    if ffmpeg_path is None:
+        print(f"ffmpeg não encontrado no PATH; pulando '{os.path.basename(output_path)}'.")
+        return (lambda frame: None), (lambda: None)
+    state = {}
+
+    def write(frame):
+        if 'process' not in state:
+            height, width = frame.shape[:2]
+            state['process'] = subprocess.Popen([
+                ffmpeg_path, '-y', '-loglevel', 'error',
+                '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+                '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', output_path
+            ], stdin=subprocess.PIPE)
+        state['process'].stdin.write(np.ascontiguousarray(frame).tobytes())
+
+    def close():
+        if 'process' in state:
+            state['process'].stdin.close()
+            if state['process'].wait() != 0:
+                raise RuntimeError(f"ffmpeg falhou ao gerar '{output_path}'")
+            print(f"Animação salva em: {output_path}")
+    return write, close
+
+FRAME_ENCODERS = {
+    'gif': _open_gif_encoder,
+    'mp4': _open_ffmpeg_encoder,
+}
+
+def _split_frame_panels(frame, rows, cols, downsample):
+    """Recorta o quadro na grade de painéis (um por colormap), reduzido para os small multiples."""
+    panel_height, panel_width = frame.shape[0] // rows, frame.shape[1] // cols
+    panels = []
+    for i in range(rows * cols):
+        row, col = divmod(i, cols)
+        panel = Image.fromarray(frame[row * panel_height:(row + 1) * panel_height,
+                                      col * panel_width:(col + 1) * panel_width])
+        panels.append(np.asarray(panel.reduce(downsample) if downsample > 1 else panel))
+    return panels
+
+def render_time_series(spec, frames_by_year, formats=ANIMATION_FORMATS, max_workers=None):
+    """Renderiza os quadros em um pool de processos e os envia, em ordem, aos encoders e às folhas de small multiples."""
+    _require_pillow()
+    year_items = sorted(frames_by_year.items())
+    if not year_items:
+        print(f"Sem dados para a série '{spec['name']}'.")
+        return
+    chunks = [year_items[i:i + TIME_SERIES_CHUNK_YEARS] for i in range(0, len(year_items), TIME_SERIES_CHUNK_YEARS)]
+    if max_workers is None:
+        max_workers = RENDER_WORKERS if RENDER_WORKERS is not None else (os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(chunks)))
+    print(f"Renderizando série '{spec['name']}': {len(year_items)} anos em {max_workers} processo(s)...")
+
+    encoders = [FRAME_ENCODERS[fmt](os.path.join(OUTPUT_DIR, f"{spec['name']}_timeseries.{fmt}"), ANIMATION_FPS)
+                for fmt in formats]
+    colormap_names = list(spec['colormaps'])
+    rows, cols = _panel_grid(spec['kind'], len(colormap_names))
+    sheet_panels = {name: [] for name in colormap_names}
+
+    def consume(chunk_frames):
+        for _, frame in chunk_frames:
+            for write, _ in encoders:
+                write(frame)
+            for name, panel in zip(colormap_names, _split_frame_panels(frame, rows, cols, SMALL_MULTIPLES_DOWNSAMPLE)):
+                sheet_panels[name].append(panel)
+
+    if max_workers == 1:
+        for chunk in chunks:
+            consume(_render_time_series_chunk(spec, chunk))
     else:
-        print("Não foi possível gerar o heatmap de correlação (dados insuficientes)")
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Janela limitada de blocos em voo: a memória não cresce com o número de anos
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_render_time_series_chunk, spec, chunk))
+                if len(pending) >= 2 * max_workers:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+
+    for _, close in encoders:
+        close()
+    for name, panels in sheet_panels.items():
+        sheet_path = os.path.join(OUTPUT_DIR, f"{spec['name']}_small_multiples_{name}.png")
+        _save_tiled_panels(panels, min(SMALL_MULTIPLES_COLUMNS, len(panels)), sheet_path)
+        print(f"Small multiples salvos em: {sheet_path}")
+
+def generate_time_series(years=None, formats=None, config=None):
+    """Gera animações e small multiples dos gráficos de barras e dispersão para vários anos.
+
+    ``config`` segue o formato de ``load_pipeline_config``; sem ela, usa ``default_pipeline_config``.
+    """
+    years = years or TIME_SERIES_YEARS
+    formats = formats or ANIMATION_FORMATS
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    del STAGE_PROFILE[:]
+    config = config or default_pipeline_config()
+    validate_pipeline_config(config)
+
+    with profile_stage('load_colormaps'):
+        colormaps_dict = load_config_colormaps(config)
+    plot_specs = [plot_spec for plot_spec in config['plots'] if plot_spec['type'] in TIME_SERIES_PLOT_TYPES]
+    with profile_stage('load_datasets'):
+        datasets = load_datasets({name: years for name in plot_dataset_years(plot_specs)})
+    pipeline_data = PipelineData(datasets)
+
+    for plot_spec in plot_specs:
+        spec = time_series_spec(plot_spec, colormaps_dict)
+        with profile_stage('prepare_time_series'):
+            frames_by_year, spec['limits'] = prepare_time_series_data(spec, pipeline_data, years)
+        with profile_stage(f"timeseries:{spec['name']}"):
+            render_time_series(spec, frames_by_year, formats)
+
+    if PROFILE_STAGES:
+        export_stage_profile()
+    print(f"\nSéries temporais salvas no diretório '{OUTPUT_DIR}'.")
+
+# --- Serviço HTTP de Renderização ---
+SERVICE_PLOT_TYPES = ('gradient', 'bars', 'scatter', 'grayscale', 'heatmap', 'cvd')
+SERVICE_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+SERVICE_COLORMAP_NAME = re.compile(r'[A-Za-z0-9_]+')  # Nomes aceitos em ?colormaps=
+_SERVICE_STATE = {}  # Datasets indexados e colormaps residentes no processo
+
+def _service_state():
+    """Carrega (uma vez por processo) os datasets indexados e os colormaps padrão."""
+    if not _SERVICE_STATE:
+        dataset_years = plot_dataset_years(default_pipeline_config()['plots'])
+        datasets = load_datasets(dataset_years)
+        colormaps = load_colormaps()
+        warm_colormap_luts(colormaps)
+        _SERVICE_STATE.update(colormaps=colormaps, data=PipelineData(datasets),
+                              years={name: set(years) for name, years in dataset_years.items()})
+    return _SERVICE_STATE
+
+def _service_data(state, plot_spec):
+    """Dados do serviço com os anos que o gráfico pede.
+
+    Na ingestão em blocos só os anos já pedidos estão em memória: os datasets
+    que não têm algum ano do gráfico são relidos com a união dos anos.
+    """
+    missing_years = {name: set(years) - state['years'].get(name, set())
+                     for name, years in plot_dataset_years([plot_spec]).items()}
+    missing_years = {name: years for name, years in missing_years.items() if years}
+    if STREAMING_INGESTION and missing_years:
+        for name, years in missing_years.items():
+            state['years'].setdefault(name, set()).update(years)
+        reloaded = load_datasets({name: sorted(state['years'][name]) for name in missing_years})
+        state['data'] = PipelineData({**state['data'].datasets, **reloaded})
+    return state['data']
+
+def _service_colormaps(state, colormap_names):
+    """Colormaps pedidos, na ordem pedida; nomes novos são carregados e mantidos residentes."""
+    colormaps = state['colormaps']
+    for name in colormap_names:
+        if name not in colormaps:
+            colormaps[name] = load_colormap(name)
+            get_colormap_lut(name, colormaps[name])
+    return {name: colormaps[name] for name in colormap_names}
+
+def build_figure_job(plot_type, colormap_names, year=None):
+    """Trabalho (função, kwargs) de uma figura sob demanda; None se não houver dados."""
+    state = _service_state()
+    colormaps = _service_colormaps(state, colormap_names or list(COLORMAP_NAMES))
+    if plot_type not in SERVICE_PLOT_TYPES:
+        raise ValueError(f"Tipo de figura desconhecido: '{plot_type}'")
+    plot_spec = next(spec for spec in default_pipeline_config()['plots'] if spec['type'] == plot_type)
+    if year and plot_type == 'heatmap':
+        # A janela de correlação termina no ano pedido e mantém a largura padrão
+        plot_spec['years'] = [year - len(YEARS_FOR_CORRELATION) + 1, year]
+    elif year and plot_type in ('bars', 'scatter'):
+        plot_spec['year'] = year
+        if plot_type == 'scatter':
+            plot_spec['y_year'] = year
+    return build_plot_job(plot_spec, _service_data(state, plot_spec), colormaps)
+
+def render_figure_bytes(plot_type, colormap_names, year=None, fmt='png'):
+    """Renderiza uma figura em um diretório temporário e devolve seus bytes (None se não houver dados)."""
+    global OUTPUT_DIR, RENDER_MODE
+    import tempfile
+    job = build_figure_job(plot_type, colormap_names, year)
+    if job is None:
+        return None
+    plot_func, plot_kwargs = job
+    base_output_dir, base_render_mode = OUTPUT_DIR, RENDER_MODE
+    with tempfile.TemporaryDirectory(prefix='figure_') as work_dir:
+        OUTPUT_DIR = work_dir
+        if fmt != 'png':
+            RENDER_MODE = 'full'  # O modo recolorível compõe PNGs diretamente
+        try:
+            # A extensão define o formato do savefig
+            plot_func(**dict(plot_kwargs, output_filename=f"figure.{fmt}"))
+            with open(os.path.join(work_dir, f"figure.{fmt}"), 'rb') as figure_file:
+                return figure_file.read()
+        finally:
+            OUTPUT_DIR, RENDER_MODE = base_output_dir, base_render_mode
+
+class FigureCache:
+    """Cache LRU de figuras renderizadas, com despejo pelo total de bytes."""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        from collections import OrderedDict
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Devolve os bytes da figura e a marca como usada recentemente (None se ausente)."""
+        payload = self._entries.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, key, payload):
+        """Insere a figura e despeja as menos usadas até caber no limite de bytes."""
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.total_bytes -= len(self._entries.pop(key))
+        self._entries[key] = payload
+        self.total_bytes += len(payload)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def stats(self):
+        """Resumo do cache para o endpoint de saúde."""
+        return {'entries': len(self._entries), 'bytes': self.total_bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+def _parse_figure_request(path, query):
+    """Interpreta /figure/<tipo>.<formato>?colormaps=a,b&year=N; levanta ValueError se inválido."""
+    figure_name = path[len('/figure/'):]
+    plot_type, _, fmt = figure_name.partition('.')
+    fmt = fmt or 'png'
+    if plot_type not in SERVICE_PLOT_TYPES:
+        raise ValueError(f"Tipo de figura inválido: '{plot_type}' (use {', '.join(SERVICE_PLOT_TYPES)})")
+    if fmt not in SERVICE_FORMATS:
+        raise ValueError(f"Formato inválido: '{fmt}' (use {', '.join(SERVICE_FORMATS)})")
+    colormap_names = tuple(name for name in query.get('colormaps', [''])[0].split(',') if name)
+    for name in colormap_names:
+        if not SERVICE_COLORMAP_NAME.fullmatch(name):
+            raise ValueError(f"Nome de colormap inválido: '{name}'")
+    year = int(query['year'][0]) if 'year' in query else None
+    return plot_type, colormap_names, year, fmt
+
+async def _write_http_response(writer, status, content_type, body, keep_alive):
+    """Escreve uma resposta HTTP/1.1 completa (com Content-Length)."""
+    reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+    headers = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+               f"Content-Type: {content_type}\r\n"
+               f"Content-Length: {len(body)}\r\n"
+               f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(headers.encode('latin-1') + body)
+    await writer.drain()
+
+def serve_figures(host=SERVICE_HOST, port=SERVICE_PORT, max_workers=None):
+    """Servidor HTTP assíncrono: figuras sob demanda, pool limitado de renderização e cache LRU em memória."""
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+    from urllib.parse import urlsplit, parse_qs
+
+    _service_state()  # Processos filhos criados por fork já herdam datasets e LUTs carregados
+    if max_workers is None:
+        max_workers = SERVICE_WORKERS if SERVICE_WORKERS is not None else (os.cpu_count() or 1)
+    cache = FigureCache(FIGURE_CACHE_MAX_BYTES)
+    in_flight = {}  # Pedidos idênticos simultâneos compartilham uma única renderização
+
+    async def render_cached(executor, request_key):
+        payload = cache.get(request_key)
+        if payload is not None:
+            return payload
+        if request_key not in in_flight:
+            loop = asyncio.get_running_loop()
+            in_flight[request_key] = loop.run_in_executor(executor, render_figure_bytes, *request_key)
+        try:
+            payload = await asyncio.shield(in_flight[request_key])
+        finally:
+            in_flight.pop(request_key, None)
+        if payload is not None:
+            cache.put(request_key, payload)
+        return payload
+
+    async def handle_connection(reader, writer, executor):
+        try:
+            while True:
+                try:
+                    request_head = await reader.readuntil(b'\r\n\r\n')
+                    request_line, *header_lines = request_head.decode('latin-1').split('\r\n')
+                    method, target, version = request_line.split(' ', 2)
+                except asyncio.LimitOverrunError:
+                    # Cabeçalho maior que o buffer do leitor (64 KiB): responder antes de fechar
+                    await _write_http_response(writer, 431, 'text/plain; charset=utf-8',
+                                               "Cabeçalho da requisição muito longo".encode(), keep_alive=False)
+                    break
+                except ValueError:
+                    await _write_http_response(writer, 400, 'text/plain; charset=utf-8',
+                                               "Requisição malformada".encode(), keep_alive=False)
+                    break
+                headers = {line.split(':', 1)[0].strip().lower(): line.split(':', 1)[1].strip()
+                           for line in header_lines if ':' in line}
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                url = urlsplit(target)
+
+                if method != 'GET':
+                    status, content_type, body = 405, 'text/plain; charset=utf-8', b"Apenas GET"
+                elif url.path == '/health':
+                    status, content_type = 200, 'application/json'
+                    body = json.dumps({'status': 'ok', 'cache': cache.stats(), 'workers': max_workers}).encode()
+                elif url.path.startswith('/figure/'):
+                    try:
+                        request_key = _parse_figure_request(url.path, parse_qs(url.query))
+                        payload = await render_cached(executor, request_key)
+                        if payload is None:
+                            status, content_type, body = 404, 'text/plain; charset=utf-8', "Sem dados para o pedido".encode()
+                        else:
+                            status, content_type, body = 200, SERVICE_FORMATS[request_key[3]], payload
+                    except (ValueError, KeyError) as e:
+                        status, content_type, body = 400, 'text/plain; charset=utf-8', str(e.args[0]).encode()
+                    except Exception as e:
+                        status, content_type, body = 500, 'text/plain; charset=utf-8', f"Erro ao renderizar: {e}".encode()
+                else:
+                    status, content_type, body = 404, 'text/plain; charset=utf-8', "Caminho desconhecido".encode()
+
+                await _write_http_response(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def run_server():
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            server = await asyncio.start_server(
+                lambda reader, writer: handle_connection(reader, writer, executor), host, port
+            )
+            print(f"Servindo figuras em http://{host}:{port}/figure/<tipo>.<png|svg> "
+                  f"({max_workers} processo(s) de renderização)")
+            async with server:
+                await server.serve_forever()
+
+    try:
+        asyncio.run(run_server())
+    except KeyboardInterrupt:
+        print("\nServidor encerrado.")
+
+# --- Função Principal ---
+def main(config=None):
+    """Função principal que orquestra o fluxo de trabalho.
+
+    ``config`` segue o formato de ``load_pipeline_config``; sem ela, usa ``default_pipeline_config``.
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    del STAGE_PROFILE[:]
+    config = config or default_pipeline_config()
+    validate_pipeline_config(config)
+    selected_figures = set(RENDER_FIGURES or FIGURE_TYPES)
+    plot_specs = [plot_spec for plot_spec in config['plots'] if plot_spec['type'] in selected_figures]
+    
+    with profile_stage('load_colormaps'):
+        colormaps_dict = load_config_colormaps(config)
+
+    # Cada dataset (e o pandas) só é carregado se algum gráfico depender dele, uma única vez,
+    # com a união dos anos pedidos; recortes, junções e correlações são compartilhados
+    dataset_years = plot_dataset_years(plot_specs)
+    datasets = {}
+    if dataset_years:
+        with profile_stage('load_datasets'):
+            datasets = load_datasets(dataset_years)
+    with profile_stage('index_datasets'):
+        pipeline_data = PipelineData(datasets)
+
+    # As prévias de daltonismo das figuras de dados saem do buffer de cada renderização
+    cvd_preview = CVD_FIGURE_PREVIEWS and any(plot_spec['type'] == 'cvd' for plot_spec in plot_specs)
+    render_jobs = []
+    for plot_spec in plot_specs:
+        # Métricas perceptuais (CIELAB / CAM02-UCS), sem renderização
+        if plot_spec['type'] == 'perceptual':
+            with profile_stage('perceptual_analysis'):
+                analyze_colormaps_perceptual(colormaps_dict)
+            continue
+        render_jobs.append(build_plot_job(plot_spec, pipeline_data, colormaps_dict, cvd_preview))
+
+    # Cada figura é um trabalho independente; a saída é idêntica à execução sequencial.
+    # Figuras cujas entradas não mudaram desde a última execução são puladas.
+    render_jobs = [job for job in render_jobs if job is not None]
+    with profile_stage('plan_incremental_build'):
+        stale_jobs, build_hashes = plan_incremental_build(render_jobs)
+    with profile_stage('render_figures'):
+        run_render_jobs(stale_jobs)
+    update_build_manifest(build_hashes)
+
+    if PROFILE_STAGES:
+        export_stage_profile()
 
     print(f"\nTodas as visualizações foram salvas no diretório '{OUTPUT_DIR}'.")
 
+# --- Benchmark Sintético ---
+BENCHMARK_NOISE_SCALE = 1e-3  # Ruído relativo aplicado às cópias sintéticas
+
+def build_synthetic_csv(source_path, target_path, scale, seed=0):
+    """Replica um CSV `scale` vezes com entidades sufixadas e ruído pequeno nos valores."""
+    source_df = pd.read_csv(source_path)
+    value_cols = [col for col in source_df.columns if col not in ('Entity', 'Code', 'Year')]
+    rng = np.random.default_rng(seed)
+    with open(target_path, 'w', encoding='utf-8', newline='') as target_file:
+        for replica in range(scale):
+            replica_df = source_df.copy()
+            if replica:
+                replica_df['Entity'] = replica_df['Entity'] + f" #{replica}"
+                replica_df['Code'] = replica_df['Code'].where(
+                    replica_df['Code'].isna(), replica_df['Code'] + f"_{replica}"
+                )
+                for col in value_cols:
+                    noise = rng.normal(1.0, BENCHMARK_NOISE_SCALE, len(replica_df))
+                    replica_df[col] = replica_df[col] * noise
+            replica_df.to_csv(target_file, index=False, header=(replica == 0))
+    return target_path
+
+def benchmark_pipeline(scales=None, output_filename='benchmark_results.json'):
+    """Executa o pipeline completo sobre CSVs sintéticos de tamanhos crescentes e grava os perfis."""
+    global OUTPUT_DIR, INCREMENTAL_BUILD
+    import tempfile
+    _require_matplotlib()
+    _require_pandas()
+    scales = scales or BENCHMARK_SCALES
+    base_output_dir, base_incremental = OUTPUT_DIR, INCREMENTAL_BUILD
+    base_cwd = os.getcwd()
+    results = []
+    try:
+        for scale in scales:
+            with tempfile.TemporaryDirectory(prefix=f"benchmark_x{scale}_") as work_dir:
+                print(f"\n=== Benchmark: CSVs x{scale} ===")
+                for csv_name in ('human-development-index.csv', 'happiness-cantril-ladder.csv', 'life-expectancy.csv'):
+                    build_synthetic_csv(os.path.join(base_cwd, csv_name), os.path.join(work_dir, csv_name), scale)
+                os.chdir(work_dir)
+                OUTPUT_DIR = os.path.join(work_dir, 'outputs')
+                INCREMENTAL_BUILD = False  # Medir sempre a renderização completa
+                wall_start = time.perf_counter()
+                main()
+                results.append({
+                    'scale': scale,
+                    'total_wall_time_s': time.perf_counter() - wall_start,
+                    'stages': list(STAGE_PROFILE)
+                })
+                os.chdir(base_cwd)
+    finally:
+        os.chdir(base_cwd)
+        OUTPUT_DIR, INCREMENTAL_BUILD = base_output_dir, base_incremental
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
+    with open(output_path, 'w', encoding='utf-8') as benchmark_file:
+        json.dump({'colormaps': list(COLORMAP_NAMES) + list(EXTRA_COLORMAPS), 'runs': results},
+                  benchmark_file, ensure_ascii=False, indent=1)
+    print(f"\nResultados do benchmark salvos em: {output_path}")
+    return results
+
+def parse_args(argv=None):
+    """Interpreta a linha de comando: renderização (padrão), benchmark ou instalação de dependências."""
+    parser = argparse.ArgumentParser(description="Análise comparativa de mapas de cores")
+    subparsers = parser.add_subparsers(dest='command')
+    render_parser = subparsers.add_parser('render', help="Gerar as visualizações (padrão: todas)")
+    render_parser.add_argument('--figures', nargs='+', choices=FIGURE_TYPES, default=None,
+                               help="Gerar apenas estas figuras (importa só o necessário)")
+    render_parser.add_argument('--export', nargs='+', choices=tuple(EXPORT_SAVE_OPTIONS), default=list(EXPORT_FORMATS),
+                               help="Formatos extras (e variantes de dpi) codificados do mesmo buffer")
+    render_parser.add_argument('--tiles', action='store_true', default=EXPORT_TILES,
+                               help="Gerar pirâmide de blocos Deep Zoom para cada figura")
+    render_parser.add_argument('--config', default=None,
+                               help="Configuração declarativa (TOML ou YAML) de datasets e gráficos")
+    timeseries_parser = subparsers.add_parser('timeseries', help="Animações e small multiples por ano")
+    timeseries_parser.add_argument('--years', type=int, nargs=2, metavar=('INICIO', 'FIM'),
+                                   default=(min(TIME_SERIES_YEARS), max(TIME_SERIES_YEARS)),
+                                   help="Intervalo de anos (inclusivo)")
+    timeseries_parser.add_argument('--formats', nargs='+', choices=('gif', 'mp4'), default=list(ANIMATION_FORMATS),
+                                   help="Formatos das animações")
+    timeseries_parser.add_argument('--config', default=None,
+                                   help="Configuração declarativa (TOML ou YAML): anima seus gráficos de barras e dispersão")
+    serve_parser = subparsers.add_parser('serve', help="Servidor HTTP local de figuras sob demanda")
+    serve_parser.add_argument('--host', default=SERVICE_HOST)
+    serve_parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    serve_parser.add_argument('--workers', type=int, default=SERVICE_WORKERS,
+                              help="Processos de renderização (padrão: todos os núcleos)")
+    subparsers.add_parser('install-deps', help="Instalar pacotes de colormaps ausentes via pip")
+    benchmark_parser = subparsers.add_parser('benchmark', help="Perfilar o pipeline sobre dados sintéticos")
+    benchmark_parser.add_argument('--scales', type=int, nargs='+', default=list(BENCHMARK_SCALES),
+                                  help="Multiplicadores do tamanho dos CSVs")
+    benchmark_parser.add_argument('--colormaps', nargs='*', default=list(EXTRA_COLORMAPS),
+                                  help="Colormaps adicionais a incluir nas comparações")
+    return parser.parse_args(argv)
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    cli_args = parse_args()
+    if cli_args.command == 'benchmark':
+        EXTRA_COLORMAPS = tuple(cli_args.colormaps)
+        benchmark_pipeline(cli_args.scales)
+    elif cli_args.command == 'timeseries':
+        generate_time_series(range(cli_args.years[0], cli_args.years[1] + 1), cli_args.formats,
+                             load_pipeline_config(cli_args.config) if cli_args.config else None)
+    elif cli_args.command == 'serve':
+        serve_figures(cli_args.host, cli_args.port, cli_args.workers)
+    elif cli_args.command == 'install-deps':
+        install_missing_packages()
+    else:
+        RENDER_FIGURES = getattr(cli_args, 'figures', None)
+        EXPORT_FORMATS = tuple(getattr(cli_args, 'export', EXPORT_FORMATS))
+        EXPORT_TILES = getattr(cli_args, 'tiles', EXPORT_TILES)
+        config_path = getattr(cli_args, 'config', None)
+        main(load_pipeline_config(config_path) if config_path else None)
@@ -0,0 +1,25 @@
+import importlib.util
+import os
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'Análise de Mapas de Cores Refatorado .py')
+
+
+def load_script():
+    spec = importlib.util.spec_from_file_location('analise_mapas_de_cores', SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module._require_matplotlib()
+    return module
+
+
+def test_reordered_colormaps_change_figure_build_hash():
+    script = load_script()
+    colormaps = {name: script.matplotlib.colormaps[name] for name in ('viridis', 'rainbow', 'magma')}
+    reversed_colormaps = dict(reversed(list(colormaps.items())))
+
+    original_hash = script.figure_build_hash(script.plot_gradients_comparison, {'colormaps': colormaps})
+    reordered_hash = script.figure_build_hash(script.plot_gradients_comparison, {'colormaps': reversed_colormaps})
+
+    assert original_hash != reordered_hash
+    assert original_hash == script.figure_build_hash(script.plot_gradients_comparison, {'colormaps': dict(colormaps)})